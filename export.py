@@ -0,0 +1,127 @@
+import io
+import os
+import re
+import time
+import zipfile
+from typing import Iterator, List, Optional, Tuple
+from incremental import DocumentStore
+
+OUTPUTS_DIR = 'outputs'
+ASSETS_DIR = 'assets'
+# Read size for files copied into the archive; also roughly the size of each streamed chunk
+CHUNK_SIZE = 64 * 1024
+# Already compressed formats are stored as-is, deflating them again only costs CPU
+STORED_EXTENSIONS = ('.pdf', '.mp3', '.wav', '.ogg', '.mp4', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.zip', '.gz')
+SAFE_NAME = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+def report_pdf_name(username: str, repo_name: str) -> str:
+    """File name of a repository's report PDF inside OUTPUTS_DIR"""
+    return f'{username}_{repo_name}_project_report.pdf'
+
+def repo_assets_dir(username: str, repo_name: str) -> str:
+    """Per-repository assets directory; the owner is included so same-named repos don't collide"""
+    return os.path.join(ASSETS_DIR, f'{username}_{repo_name}')
+
+class _StreamSink(io.RawIOBase):
+    """Write-only, non-seekable file that hands written bytes back out in chunks.
+
+    ZipFile sees an unseekable target and writes data descriptors after each
+    entry instead of seeking back to patch headers, so nothing beyond the
+    current chunk is ever held.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def bundle_entries(username: str, repo_name: str, doc_store: Optional[DocumentStore] = None) -> List[Tuple[str, object]]:
+    """Everything the jobs left behind for one repository, as (name in archive, path on disk or bytes)"""
+    doc_store = doc_store or DocumentStore()
+    entries = []
+    for doc, arcname in (('readme', 'README.md'), ('report', 'report.md')):
+        state = doc_store.load(username, repo_name, doc)
+        if state:
+            entries.append((arcname, state['text'].encode('utf-8')))
+
+    pdf_path = os.path.join(OUTPUTS_DIR, report_pdf_name(username, repo_name))
+    if os.path.isfile(pdf_path):
+        entries.append(('project_report.pdf', pdf_path))
+
+    assets_dir = repo_assets_dir(username, repo_name)
+    if os.path.isdir(assets_dir):
+        for name in sorted(os.listdir(assets_dir)):
+            path = os.path.join(assets_dir, name)
+            if os.path.isfile(path):
+                entries.append((f'assets/{name}', path))
+    return entries
+
+def stream_zip(entries: List[Tuple[str, object]]) -> Iterator[bytes]:
+    """Yield a zip archive of `entries` piece by piece as it is written.
+
+    Entries are either bytes or a path read in CHUNK_SIZE pieces, so memory
+    stays flat however large the files are.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for arcname, source in entries:
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            info.compress_type = (zipfile.ZIP_STORED if arcname.lower().endswith(STORED_EXTENSIONS)
+                                  else zipfile.ZIP_DEFLATED)
+            if isinstance(source, bytes):
+                with archive.open(info, 'w') as dest:
+                    dest.write(source)
+                yield sink.drain()
+                continue
+
+            info.file_size = os.path.getsize(source)
+            with open(source, 'rb') as src, archive.open(info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as dest:
+                while True:
+                    data = src.read(CHUNK_SIZE)
+                    if not data:
+                        break
+                    dest.write(data)
+                    yield sink.drain()
+            # Data descriptor, written when the entry closes
+            yield sink.drain()
+    # Central directory, written when the archive closes
+    yield sink.drain()
+
+def create_export_app(demo, doc_store: Optional[DocumentStore] = None):
+    """FastAPI app serving `demo` at / and the streamed bundle at /export/{owner}/{repo}.zip"""
+    # Imported here so the archive helpers above don't need the web stack
+    import gradio as gr
+    from fastapi import FastAPI, HTTPException
+    from fastapi.responses import StreamingResponse
+
+    app = FastAPI()
+    doc_store = doc_store or DocumentStore()
+
+    @app.get('/export/{username}/{repo_name}.zip')
+    def export_bundle(username: str, repo_name: str):
+        if not SAFE_NAME.match(username) or not SAFE_NAME.match(repo_name):
+            raise HTTPException(status_code=400, detail='invalid repository name')
+        entries = bundle_entries(username, repo_name, doc_store)
+        if not entries:
+            raise HTTPException(status_code=404, detail='nothing generated for this repository yet')
+        return StreamingResponse(
+            stream_zip(entries), media_type='application/zip',
+            headers={'Content-Disposition': f'attachment; filename="{repo_name}_bundle.zip"'},
+        )
+
+    return gr.mount_gradio_app(app, demo, path='/')
@@ -0,0 +1,120 @@
+import math
+import time
+import requests
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# Largest page size the REST API accepts
+MAX_PER_PAGE = 100
+# The contents API lists at most this many entries per directory
+CONTENTS_API_CAP = 1000
+# Tries per page when GitHub answers with a server error, rate limit or dropped connection
+PAGE_ATTEMPTS = 3
+
+def _page_number(url: str) -> Optional[int]:
+    page = parse_qs(urlparse(url).query).get('page')
+    return int(page[0]) if page else None
+
+def _get_page(url: str, headers: Dict, params: Dict = None) -> requests.Response:
+    for attempt in range(PAGE_ATTEMPTS):
+        try:
+            response = requests.get(url, headers=headers, params=params)
+            if response.status_code < 500 and response.status_code != 429:
+                break
+        except requests.RequestException:
+            if attempt == PAGE_ATTEMPTS - 1:
+                raise
+        if attempt < PAGE_ATTEMPTS - 1:
+            time.sleep(2 ** attempt)
+    if response.status_code != 200:
+        print(f"Error accessing {url}: {response.status_code}")
+    return response
+
+def fetch_paginated(url: str, headers: Dict = None, params: Dict = None,
+                    per_page: int = MAX_PER_PAGE, max_items: Optional[int] = None,
+                    max_workers: int = 4) -> List:
+    """Fetch every item of a paginated REST listing, or just the first `max_items`.
+
+    The first response's `Link: rel="last"` tells how many pages exist, so the
+    remaining pages (capped to what `max_items` needs) are fetched concurrently
+    instead of one after another. Listings that only advertise `rel="next"`
+    are followed in order. Failing pages are retried; a page that still fails
+    is reported, as the listing is then incomplete.
+    """
+    headers = headers or {}
+    page_size = min(per_page, max_items, MAX_PER_PAGE) if max_items else min(per_page, MAX_PER_PAGE)
+    params = {**(params or {}), 'per_page': page_size}
+
+    response = _get_page(url, headers, params)
+    if response.status_code != 200:
+        return []
+    items = response.json()
+
+    def enough():
+        return max_items is not None and len(items) >= max_items
+
+    links = response.links
+    if 'next' in links and not enough():
+        last_page = _page_number(links.get('last', {}).get('url', ''))
+        if last_page:
+            if max_items is not None:
+                last_page = min(last_page, math.ceil(max_items / page_size))
+            pages = range(2, last_page + 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                for number, page in zip(pages, executor.map(
+                        lambda p: _get_page(url, headers, {**params, 'page': p}), pages)):
+                    if page.status_code == 200:
+                        items.extend(page.json())
+                    else:
+                        print(f"Listing of {url} is incomplete, page {number} failed")
+        else:
+            next_url = links['next']['url']
+            while next_url and not enough():
+                page = _get_page(next_url, headers)
+                if page.status_code != 200:
+                    print(f"Listing of {url} is incomplete, stopped at {next_url}")
+                    break
+                items.extend(page.json())
+                next_url = page.links.get('next', {}).get('url')
+
+    return items[:max_items] if max_items is not None else items
+
+def tree_to_structure(entries: List[Dict]) -> Dict:
+    """Turn recursive git tree entries into the scraper's {'files', 'directories'} shape"""
+    root = {'files': [], 'directories': {}}
+    for entry in entries:
+        *parents, name = entry['path'].split('/')
+        node = root
+        for parent in parents:
+            node = node['directories'].setdefault(parent, {'files': [], 'directories': {}})
+        if entry['type'] == 'blob':
+            node['files'].append(name)
+        elif entry['type'] == 'tree':
+            node['directories'].setdefault(name, {'files': [], 'directories': {}})
+    return root
+
+def tree_blobs(entries: List[Dict]) -> Dict[str, Dict]:
+    """Map every blob path in recursive git tree entries to its SHA and size"""
+    return {
+        entry['path']: {'sha': entry['sha'], 'size': entry.get('size', 0)}
+        for entry in entries if entry['type'] == 'blob'
+    }
+
+def fetch_tree(repo_api_url: str, tree_sha: str, headers: Dict = None) -> Optional[Dict]:
+    """Recursive git trees listing under `tree_sha` ({'tree', 'truncated'}), or None if unavailable"""
+    url = f"{repo_api_url}/git/trees/{tree_sha}"
+    response = _get_page(url, headers or {}, {'recursive': '1'})
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    if data.get('truncated'):
+        print(f"Tree listing for {url} was truncated by GitHub")
+    return data
+
+def fetch_tree_structure(repo_api_url: str, tree_sha: str, headers: Dict = None) -> Optional[Dict]:
+    """Whole subtree under `tree_sha` in one recursive git trees call, or None if unavailable or truncated"""
+    data = fetch_tree(repo_api_url, tree_sha, headers)
+    if data is None or data.get('truncated'):
+        return None
+    return tree_to_structure(data.get('tree', []))
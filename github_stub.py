@@ -0,0 +1,144 @@
+import re
+import json
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+class StubGitHubServer:
+    """Local stand-in for the GitHub metadata endpoints, for tests and offline runs.
+
+    `repos` maps 'owner/name' to normalised metadata, the same shape
+    GitHubMetadataFetcher returns. Both the GraphQL endpoint and the REST
+    endpoints used by the fallback are served, REST answers carry an ETag, and
+    every request is counted in `requests` so callers can check how many round
+    trips were made.
+
+        with StubGitHubServer({'octo/demo': {...}}) as stub:
+            fetcher = GitHubMetadataFetcher('token', api_url=stub.api_url, graphql_url=stub.graphql_url)
+    """
+
+    def __init__(self, repos: Dict[str, Dict], host: str = '127.0.0.1', port: int = 0):
+        self.repos = repos
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, etag=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                stub.requests.append(('POST', self.path))
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if self.path != '/graphql' or not self.headers.get('Authorization'):
+                    return self._send(401, {'message': 'Requires authentication'})
+                self._send(200, stub.graphql_response(payload.get('variables', {})))
+
+            def do_GET(self):
+                stub.requests.append(('GET', self.path))
+                status, payload = stub.rest_response(self.path.split('?')[0])
+                if status != 200:
+                    return self._send(status, payload)
+                # Like GitHub, answer a matching If-None-Match with an empty 304
+                digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+                etag = f'"{digest}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self._send(status, payload, etag)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = None
+
+    @property
+    def api_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def graphql_url(self) -> str:
+        return f'{self.api_url}/graphql'
+
+    def graphql_response(self, variables: Dict) -> Dict:
+        data, errors = {}, []
+        i = 0
+        while f'o{i}' in variables:
+            full_name = f"{variables[f'o{i}']}/{variables[f'n{i}']}"
+            repo = self.repos.get(full_name)
+            if repo is None:
+                data[f'r{i}'] = None
+                errors.append({'type': 'NOT_FOUND', 'path': [f'r{i}'],
+                               'message': f"Could not resolve to a Repository with the name '{full_name}'."})
+            else:
+                data[f'r{i}'] = self._graphql_node(repo)
+            i += 1
+
+        response = {'data': data}
+        if errors:
+            response['errors'] = errors
+        return response
+
+    @staticmethod
+    def _graphql_node(repo: Dict) -> Dict:
+        return {
+            'stargazerCount': repo.get('stargazers_count'),
+            'forkCount': repo.get('forks_count'),
+            'createdAt': repo.get('created_at'),
+            'pushedAt': repo.get('pushed_at'),
+            'diskUsage': repo.get('size'),
+            'description': repo.get('description'),
+            'primaryLanguage': {'name': repo['language']} if repo.get('language') else None,
+            'languages': {'edges': [
+                {'size': size, 'node': {'name': name}} for name, size in repo.get('languages', {}).items()
+            ]},
+            'defaultBranchRef': {
+                'name': repo.get('default_branch', 'main'),
+                'target': {'oid': repo.get('head_sha')},
+            },
+        }
+
+    def rest_response(self, path: str):
+        match = re.match(r'^/repos/([^/]+)/([^/]+)(/.*)?$', path)
+        repo = self.repos.get(f'{match.group(1)}/{match.group(2)}') if match else None
+        if repo is None:
+            return 404, {'message': 'Not Found'}
+
+        endpoint = match.group(3) or ''
+        if endpoint == '':
+            fields = {k: v for k, v in repo.items() if k not in ('languages', 'contributors', 'head_sha')}
+            return 200, fields
+        if endpoint == '/languages':
+            return 200, repo.get('languages', {})
+        if endpoint == '/contributors':
+            return 200, repo.get('contributors', [])
+        if endpoint == '/commits/HEAD':
+            return 200, {'sha': repo.get('head_sha')}
+        return 404, {'message': 'Not Found'}
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
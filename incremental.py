@@ -0,0 +1,185 @@
+import os
+import re
+import json
+import time
+import tempfile
+import requests
+from typing import Dict, List, Optional, Set, Tuple
+
+STATE_DIR = os.path.join('.cache', 'documents')
+
+# The compare API stops listing files after this many entries
+COMPARE_FILES_CAP = 300
+# A model reply wrapped whole in a code fence, e.g. ```markdown ... ```
+FENCED_REPLY = re.compile(r'^```[^\n]*\n(.*)\n```$', re.DOTALL)
+
+DEPENDENCY_FILES = {
+    'requirements.txt', 'requirements-dev.txt', 'setup.py', 'setup.cfg', 'pyproject.toml',
+    'Pipfile', 'Pipfile.lock', 'poetry.lock', 'environment.yml', 'environment.yaml',
+    'package.json', 'package-lock.json', 'yarn.lock', 'Cargo.toml', 'go.mod',
+    'pom.xml', 'build.gradle', 'Gemfile', 'composer.json',
+}
+USAGE_FILES = {
+    'main.py', 'app.py', '__main__.py', 'cli.py', 'manage.py', 'run.py', 'Makefile',
+    'Dockerfile', 'docker-compose.yml', 'index.js', 'server.js', '.env.example',
+}
+CONFIG_EXTENSIONS = ('.yaml', '.yml', '.toml', '.ini', '.cfg')
+
+# Header keywords used to map generated sections back to the inputs they depend on
+README_SECTIONS = {
+    'contributors': ['contributor'],
+    'dependencies': ['depend', 'requirement', 'installation', 'install'],
+    'usage': ['usage', 'getting started', 'how to run', 'running'],
+    'structure': ['structure', 'explanation', 'overview', 'features', 'architecture'],
+}
+REPORT_SECTIONS = {
+    'dependencies': ['implementation', 'requirement'],
+    'usage': ['result'],
+    'structure': ['introduction', 'methodology'],
+}
+
+def parse_repo_link(repo_url: str) -> Tuple[str, str]:
+    parts = repo_url.rstrip('/').split('/')
+    return parts[-2], parts[-1]
+
+def fetch_changed_files(username: str, repo_name: str, base: str, head: str,
+                        headers: Dict = None) -> Optional[Dict]:
+    """Return the compare diff between two commits, or None when a full run is needed"""
+    try:
+        url = f"https://api.github.com/repos/{username}/{repo_name}/compare/{base}...{head}"
+        response = requests.get(url, headers=headers or {})
+        if response.status_code != 200:
+            return None
+
+        data = response.json()
+        files = data.get('files', [])
+        # A truncated file list can't be trusted to find every affected section
+        if len(files) >= COMPARE_FILES_CAP:
+            return None
+
+        return {
+            'total_commits': data.get('total_commits', 0),
+            'files': [{'filename': f['filename'], 'status': f['status']} for f in files],
+        }
+    except Exception:
+        return None
+
+def affected_sections(diff: Dict) -> Set[str]:
+    """Work out which document inputs a compare diff touches"""
+    affected = set()
+    if diff['total_commits'] > 0:
+        affected.add('contributors')
+
+    for changed in diff['files']:
+        name = os.path.basename(changed['filename'])
+        if changed['status'] in ('added', 'removed', 'renamed'):
+            affected.add('structure')
+        if name in DEPENDENCY_FILES:
+            affected.add('dependencies')
+        if name in USAGE_FILES or name.lower().startswith('readme') or name.endswith(CONFIG_EXTENSIONS):
+            affected.add('usage')
+
+    return affected
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split Markdown into (header, body) pairs on level-2 headers, skipping code fences"""
+    sections = [('', [])]
+    in_fence = False
+    for line in text.split('\n'):
+        if line.lstrip().startswith('```'):
+            in_fence = not in_fence
+        if not in_fence and line.startswith('## '):
+            sections.append((line.strip(), []))
+        else:
+            sections[-1][1].append(line)
+
+    return [(header, '\n'.join(body)) for header, body in sections]
+
+def join_sections(sections: List[Tuple[str, str]]) -> str:
+    parts = []
+    for header, body in sections:
+        parts.append(f"{header}\n{body}" if header else body)
+    return '\n'.join(parts)
+
+def section_key(header: str, section_map: Dict[str, List[str]]) -> Optional[str]:
+    title = re.sub(r'^#+\s*[\d.]*\s*', '', header).lower()
+    for key, keywords in section_map.items():
+        if any(keyword in title for keyword in keywords):
+            return key
+    return None
+
+def clean_section(reply: str, header: str) -> Optional[str]:
+    """A rewritten section with any wrapping code fence removed.
+
+    Returns None unless the reply is exactly one section under `header`, so a
+    reply that lost its header or grew extra sections is never spliced in.
+    """
+    text = reply.strip()
+    match = FENCED_REPLY.match(text)
+    if match:
+        text = match.group(1).strip()
+    sections = split_sections(text)
+    if len(sections) != 2 or sections[0][1].strip() or sections[1][0] != header:
+        return None
+    return f'{text}\n'
+
+def splice_sections(text: str, replacements: Dict[str, str], before: str = '## License') -> str:
+    """Replace whole sections (header line included) and insert missing ones before `before`"""
+    sections = split_sections(text)
+    headers = [header for header, _ in sections]
+
+    spliced = []
+    for header, body in sections:
+        if header in replacements:
+            new_header, _, new_body = replacements[header].strip('\n').partition('\n')
+            spliced.append((new_header.strip(), f"{new_body}\n"))
+        else:
+            spliced.append((header, body))
+
+    for header, section in replacements.items():
+        if header in headers:
+            continue
+        new_header, _, new_body = section.strip('\n').partition('\n')
+        index = headers.index(before) if before in headers else len(spliced)
+        spliced.insert(index, (new_header.strip(), f"{new_body}\n"))
+        headers.insert(index, new_header.strip())
+
+    return join_sections(spliced)
+
+class DocumentStore:
+    """Keeps each generated document with the commit SHA and inputs it was built from"""
+
+    def __init__(self, state_dir: str = STATE_DIR):
+        self.state_dir = state_dir
+
+    def _path(self, username: str, repo_name: str, doc: str) -> str:
+        return os.path.join(self.state_dir, f'{username}_{repo_name}_{doc}.json')
+
+    def load(self, username: str, repo_name: str, doc: str) -> Optional[Dict]:
+        path = self._path(username, repo_name, doc)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable document state {path}: {e}")
+            return None
+
+    def save(self, username: str, repo_name: str, doc: str, sha: Optional[str],
+             inputs: Dict, text: str):
+        if not sha:
+            return
+        os.makedirs(self.state_dir, exist_ok=True)
+        state = {
+            'sha': sha,
+            'generated_at': int(time.time()),
+            'inputs': inputs,
+            'text': text,
+        }
+        path = self._path(username, repo_name, doc)
+        # A unique temp file, since the webhook worker and users may save the same document at once
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,268 @@
+import time
+import random
+import hashlib
+import threading
+import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, Optional
+import google.generativeai as genai
+from google.generativeai import caching
+from google.api_core import exceptions as google_exceptions
+from prompts import assemble
+
+TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.TooManyRequests,
+    ConnectionError,
+    TimeoutError,
+)
+
+# Gemini only accepts cached content above this size; smaller contexts are sent inline
+MIN_CACHE_TOKENS = 32768
+CHARS_PER_TOKEN = 4
+# Cached-content handles kept for reuse; expired ones are dropped first
+MAX_CACHED_CONTEXTS = 64
+
+class LLMClient:
+    """Gemini call layer with deadlines, jittered retries and hedged requests.
+
+    Once enough latencies have been seen for a task, a call still running
+    after that task's `hedge_percentile` latency gets a duplicate request (to
+    the fallback model if one is set) and whichever answers first wins. Tasks
+    are kept apart because a long report prompt is always slower than a short
+    section rewrite. The losing request can't be cancelled and finishes in the
+    background.
+
+    Calls made with a `context` reuse it as a cached-content prefix when the
+    backend allows it (see `cache_model_name`), otherwise the context is sent
+    inline ahead of the task.
+
+    When `rate_limiter` (anything with `acquire()`) is set, every request sent
+    to the model, including retries and hedges, takes one token from it first.
+    """
+
+    def __init__(self, model_name: str = "gemini-1.5-flash", fallback_model_name: Optional[str] = None,
+                 deadline: float = 120.0, max_retries: int = 3, backoff_base: float = 1.0,
+                 backoff_max: float = 20.0, hedge: bool = True, hedge_percentile: float = 0.95,
+                 hedge_min_samples: int = 20, max_workers: int = 8,
+                 cache_model_name: Optional[str] = None, cache_ttl_minutes: int = 30,
+                 rate_limiter=None):
+        self.model = genai.GenerativeModel(model_name)
+        self.rate_limiter = rate_limiter
+        self.cache_model_name = cache_model_name
+        self.cache_ttl = datetime.timedelta(minutes=cache_ttl_minutes)
+        self._cached_models = {}
+        self.fallback_model = genai.GenerativeModel(fallback_model_name) if fallback_model_name else None
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._counters = {
+            'calls': 0, 'retries': 0, 'timeouts': 0, 'errors': 0,
+            'hedged': 0, 'hedge_wins': 0,
+            'prompt_tokens': 0, 'cached_tokens': 0, 'context_cache_hits': 0,
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _record_latency(self, task: str, seconds: float):
+        with self._lock:
+            self._latencies.setdefault(task, deque(maxlen=500)).append(seconds)
+
+    def _percentile(self, p: float, task: Optional[str] = None) -> Optional[float]:
+        """Latency percentile of one task, or of all calls when `task` is None"""
+        with self._lock:
+            if task is None:
+                latencies = sorted(seconds for window in self._latencies.values() for seconds in window)
+            else:
+                latencies = sorted(self._latencies.get(task, ()))
+        if not latencies:
+            return None
+        return latencies[min(int(p * len(latencies)), len(latencies) - 1)]
+
+    def hedge_delay(self, task: str = 'default') -> Optional[float]:
+        """Seconds to wait before hedging a `task` call, or None while it has too little history"""
+        with self._lock:
+            samples = len(self._latencies.get(task, ()))
+        if not self.hedge or samples < self.hedge_min_samples:
+            return None
+        return self._percentile(self.hedge_percentile, task)
+
+    def _context_model(self, context: str):
+        """Model bound to `context` as cached content, or None if it can't be cached"""
+        if not self.cache_model_name or len(context) < MIN_CACHE_TOKENS * CHARS_PER_TOKEN:
+            return None
+
+        key = hashlib.sha256(context.encode('utf-8')).hexdigest()
+        with self._lock:
+            entry = self._cached_models.get(key)
+        if entry and entry[1] > time.monotonic():
+            self._count('context_cache_hits')
+            return entry[0]
+
+        try:
+            cache = caching.CachedContent.create(
+                model=self.cache_model_name, display_name=f'reporover-{key[:16]}',
+                contents=[context], ttl=self.cache_ttl,
+            )
+            model = genai.GenerativeModel.from_cached_content(cached_content=cache)
+        except Exception as e:
+            print(f"Context caching unavailable, sending context inline: {e}")
+            return None
+
+        # Stop reusing the entry a minute before the server expires it
+        expires_at = time.monotonic() + self.cache_ttl.total_seconds() - 60
+        with self._lock:
+            now = time.monotonic()
+            for stale in [k for k, (_, expiry) in self._cached_models.items() if expiry <= now]:
+                del self._cached_models[stale]
+            while len(self._cached_models) >= MAX_CACHED_CONTEXTS:
+                del self._cached_models[min(self._cached_models, key=lambda k: self._cached_models[k][1])]
+            self._cached_models[key] = (model, expires_at)
+        return model
+
+    def _call(self, model, prompt, timeout: float) -> str:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        response = model.generate_content(prompt, request_options={'timeout': max(timeout, 1.0)})
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            self._count('prompt_tokens', getattr(usage, 'prompt_token_count', 0) or 0)
+            self._count('cached_tokens', getattr(usage, 'cached_content_token_count', 0) or 0)
+        return response.text
+
+    def _attempt(self, prompt, deadline_at: float, context: Optional[str] = None, task: str = 'default') -> str:
+        """One attempt, hedged once the primary request passes the latency threshold"""
+        start = time.monotonic()
+        inline_prompt = assemble(context, prompt) if context else prompt
+        context_model = self._context_model(context) if context else None
+        if context_model is not None:
+            primary = self.executor.submit(self._call, context_model, prompt, deadline_at - start)
+        else:
+            primary = self.executor.submit(self._call, self.model, inline_prompt, deadline_at - start)
+        pending = {primary}
+
+        delay = self.hedge_delay(task)
+        if delay is not None:
+            done, _ = wait(pending, timeout=min(delay, deadline_at - start))
+            if not done:
+                self._count('hedged')
+                # The hedge goes out inline, a fallback model can't read the primary's cache
+                hedge_model = self.fallback_model or self.model
+                pending.add(self.executor.submit(
+                    self._call, hedge_model, inline_prompt, deadline_at - time.monotonic()))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(deadline_at - time.monotonic(), 0),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                self._count('timeouts')
+                raise TimeoutError(f"LLM call exceeded the {self.deadline:.0f}s deadline")
+
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                self._record_latency(task, time.monotonic() - start)
+                if future is not primary:
+                    self._count('hedge_wins')
+                return future.result()
+
+        raise error
+
+    def generate(self, prompt, context: Optional[str] = None, task: str = 'default') -> str:
+        """Return the model's text for `prompt`, retrying transient errors within the deadline.
+
+        `context` is the shared repository prefix from prompts.build_repo_context.
+        `task` names the kind of prompt; latency history and hedging are kept per task.
+        """
+        self._count('calls')
+        deadline_at = time.monotonic() + self.deadline
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._attempt(prompt, deadline_at, context, task)
+            except TRANSIENT_ERRORS as e:
+                if not self._back_off(e, attempt, deadline_at):
+                    raise
+            except Exception:
+                self._count('errors')
+                raise
+
+    def _back_off(self, error: Exception, attempt: int, deadline_at: float) -> bool:
+        """Sleep before retrying a transient error; False (counted as an error) when out of tries or time"""
+        remaining = deadline_at - time.monotonic()
+        if attempt == self.max_retries or remaining <= 0:
+            self._count('errors')
+            return False
+        # Full jitter keeps concurrent retries from lining up
+        backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        print(f"Transient LLM error ({type(error).__name__}), retrying in {backoff:.1f}s")
+        self._count('retries')
+        time.sleep(min(backoff, remaining))
+        return True
+
+    def stream(self, prompt, context: Optional[str] = None, task: str = 'default') -> Iterator[str]:
+        """Yield the model's text as it is generated.
+
+        Transient errors before the first chunk are retried like generate();
+        once output has been shown the stream can't be retried or hedged.
+        """
+        self._count('calls')
+        deadline_at = time.monotonic() + self.deadline
+        context_model = self._context_model(context) if context else None
+        if context_model is not None:
+            model, contents = context_model, prompt
+        else:
+            model, contents = self.model, assemble(context, prompt) if context else prompt
+
+        for attempt in range(self.max_retries + 1):
+            start = time.monotonic()
+            started = False
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                response = model.generate_content(contents, stream=True, request_options={
+                    'timeout': max(deadline_at - start, 1.0)})
+                for chunk in response:
+                    started = True
+                    yield chunk.text
+                break
+            except TRANSIENT_ERRORS as e:
+                if started:
+                    self._count('errors')
+                    raise
+                if not self._back_off(e, attempt, deadline_at):
+                    raise
+            except Exception:
+                self._count('errors')
+                raise
+        self._record_latency(task, time.monotonic() - start)
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+        calls = counters['calls'] or 1
+        hedged = counters['hedged'] or 1
+        return {
+            **counters,
+            'hedge_rate': counters['hedged'] / calls,
+            'hedge_win_rate': counters['hedge_wins'] / hedged,
+            'p50': self._percentile(0.50),
+            'p95': self._percentile(0.95),
+            'p99': self._percentile(0.99),
+        }
@@ -1,10 +1,28 @@
 import os
 import json
+import argparse
+import threading
+from collections import OrderedDict
 import gradio as gr
+import uvicorn
 import requests
 import google.generativeai as genai
 from dotenv import load_dotenv
 from typing import Dict, List
+from incremental import (DocumentStore, README_SECTIONS, REPORT_SECTIONS, parse_repo_link,
+                         fetch_changed_files, affected_sections,
+                         split_sections, section_key, clean_section, splice_sections)
+from sampler import KeyFileSampler
+from stats import RepoStatsIndex
+from llm import LLMClient
+from prompts import build_repo_context
+from metadata import GitHubMetadataFetcher
+from webhook import receiver_from_env
+from server import ServerSettings, AdmissionController
+from github_api import CONTENTS_API_CAP, fetch_tree, fetch_tree_structure, tree_blobs, tree_to_structure
+from preview import MarkdownPreviewRenderer
+from export import create_export_app, report_pdf_name, repo_assets_dir
+from profiling import profiled, profiling_enabled
 
 # PDF Generation Imports
 from reportlab.lib.pagesizes import letter
@@ -20,16 +38,26 @@ class GitHubRepoScraper:
         if github_token:
             self.headers['Authorization'] = f'token {github_token}'
     
-    def scrape_repo_structure(self, repo_url: str) -> Dict[str, List[str]]:
+    def scrape_repo_structure(self, repo_url: str, ref: str = 'HEAD'):
+        """Structure, owner, name and {path: {'sha', 'size'}} of every blob at `ref`.
+
+        One recursive tree call covers the whole repository; the structure is crawled
+        directory by directory only when GitHub truncates it.
+        """
         parts = repo_url.rstrip('/').split('/')
         username = parts[-2]
         repo_name = parts[-1]
-        base_url = f'https://api.github.com/repos/{username}/{repo_name}/contents'
-        
-        repo_structure = self._get_directory_contents(base_url, '')
-        return repo_structure, username, repo_name
+        repo_api_url = f'https://api.github.com/repos/{username}/{repo_name}'
+
+        tree = fetch_tree(repo_api_url, ref, self.headers)
+        entries = (tree or {}).get('tree', [])
+        if tree is None or tree.get('truncated'):
+            repo_structure = self._get_directory_contents(f'{repo_api_url}/contents', '')
+        else:
+            repo_structure = tree_to_structure(entries)
+        return repo_structure, username, repo_name, tree_blobs(entries)
     
-    def _get_directory_contents(self, base_url: str, path: str) -> Dict[str, List[str]]:
+    def _get_directory_contents(self, base_url: str, path: str, tree_sha: str = 'HEAD') -> Dict[str, List[str]]:
         full_url = f"{base_url}{f'/{path}' if path else ''}"
         response = requests.get(full_url, headers=self.headers)
         
@@ -38,6 +66,14 @@ class GitHubRepoScraper:
             return {}
         
         contents = response.json()
+
+        # The contents API truncates big directories, so list those through the git trees API instead
+        if len(contents) >= CONTENTS_API_CAP:
+            repo_api_url = base_url.rsplit('/contents', 1)[0]
+            tree_structure = fetch_tree_structure(repo_api_url, tree_sha, self.headers)
+            if tree_structure is not None:
+                return tree_structure
+
         structure = {
             'files': [],
             'directories': {},
@@ -48,7 +84,7 @@ class GitHubRepoScraper:
                 structure['files'].append(item['name'])
             elif item['type'] == 'dir':
                 dir_path = f"{path}/{item['name']}" if path else item['name']
-                structure['directories'][item['name']] = self._get_directory_contents(base_url, dir_path)
+                structure['directories'][item['name']] = self._get_directory_contents(base_url, dir_path, item['sha'])
         
         return structure
 
@@ -75,37 +111,191 @@ class PDFGenerator:
         doc.build(story)
         return filepath
 
+# Number of repository snapshots kept in memory for reuse across tasks
+SNAPSHOT_CACHE_SIZE = 32
+# Pinned model version; context caching needs an explicit version, and the same one keeps
+# output independent of whether a context happened to be cached
+MODEL_NAME = "gemini-1.5-flash-001"
+
 class ReadmeGenerator:
-    def __init__(self, gemini_api_key):
+    def __init__(self, gemini_api_key, fallback_model=None, github_token=None, profile=None):
         genai.configure(api_key=gemini_api_key)
-        self.model = genai.GenerativeModel("gemini-1.5-flash")
-        self.scraper = GitHubRepoScraper()
+        # Jobs write cProfile/tracemalloc captures to outputs/profiles when set
+        self.profile = profiling_enabled() if profile is None else profile
+        self.llm = LLMClient(MODEL_NAME, fallback_model_name=fallback_model,
+                             cache_model_name=f"models/{MODEL_NAME}")
+        self.scraper = GitHubRepoScraper(github_token)
+        self.metadata = GitHubMetadataFetcher(github_token)
         self.pdf_generator = PDFGenerator()
+        self.doc_store = DocumentStore()
+        self.sampler = KeyFileSampler(self.scraper.headers)
+        self.stats_index = RepoStatsIndex(self.scraper.headers)
+        self._snapshots = OrderedDict()
+        # Shared by the Gradio worker threads and the webhook worker
+        self._snapshots_lock = threading.Lock()
     
-    def fetch_contributors(self, username, repo_name):
-        try:
-            contributors_url = f"https://api.github.com/repos/{username}/{repo_name}/contributors"
-            response = requests.get(contributors_url)
-            if response.status_code == 200:
-                return response.json()[:5]  # Limit to top 5 contributors
-            return []
-        except Exception:
-            return []
+    def _repo_facts(self, username, repo_name, repo_structure, head_sha, repo_data=None, tree=None):
+        """Key file excerpts and precomputed statistics, sharing one tree listing"""
+        if tree is None:
+            tree = self.sampler.fetch_tree(username, repo_name, head_sha or 'HEAD')
+        excerpts = self.sampler.sample(username, repo_name, repo_structure, head_sha, tree=tree)
+        stats = self.stats_index.build(username, repo_name, repo_structure, head_sha, tree, repo_data)
+        return self.sampler.format_excerpts(excerpts), self.stats_index.format_stats(stats)
+
+    def _snapshot(self, repo_link, head_sha, repo_data):
+        """Scrape a repository once per commit and build the prompt context all tasks share"""
+        username, repo_name = parse_repo_link(repo_link)
+        key = (username, repo_name, head_sha)
+        if head_sha:
+            with self._snapshots_lock:
+                snapshot = self._snapshots.get(key)
+                if snapshot is not None:
+                    self._snapshots.move_to_end(key)
+                    return snapshot
+
+        # Scrape repository structure at the snapshot's commit, keeping the listing for the facts below
+        repo_structure, username, repo_name, tree = self.scraper.scrape_repo_structure(repo_link, head_sha or 'HEAD')
+
+        # Sample key files and index the tree so the model works from real facts
+        excerpts_str, stats_str = self._repo_facts(username, repo_name, repo_structure, head_sha, repo_data, tree)
+
+        snapshot = {
+            'username': username,
+            'repo_name': repo_name,
+            'structure': repo_structure,
+            'repo_data': repo_data,
+            'context': build_repo_context(repo_link, repo_structure, repo_data, stats_str, excerpts_str),
+        }
+        if head_sha:
+            with self._snapshots_lock:
+                self._snapshots[key] = snapshot
+                while len(self._snapshots) > SNAPSHOT_CACHE_SIZE:
+                    self._snapshots.popitem(last=False)
+        return snapshot
+
+    def warm_cache(self, repo_link, regenerate=False):
+        """Refresh the snapshot, blob and statistics caches for a repository's current head.
+
+        Raises RuntimeError when a regeneration reports an error, so callers can count it.
+        """
+        username, repo_name = parse_repo_link(repo_link)
+        repo_data = self.metadata.fetch(username, repo_name)
+        self._snapshot(repo_link, repo_data.get('head_sha'), repo_data)
+        if regenerate:
+            results = [self.generate_readme(repo_link), self.generate_report(repo_link)]
+            errors = [result for result in results if result.startswith('Error generating')]
+            if errors:
+                raise RuntimeError('; '.join(errors))
+
+    @staticmethod
+    def _contributors_section(contributors):
+        contributors_section = "\n## Contributors\n\n"
+        for contrib in contributors:
+            contributors_section += f"- [{contrib['login']}]({contrib['html_url']}) - {contrib['contributions']} contributions\n"
+        return contributors_section
+
+    def _refresh_document(self, repo_link, doc, state, head_sha, repo_data):
+        """Regenerate only the sections of a stored document affected since its commit.
+
+        Returns the updated text, or None when a full regeneration is needed.
+        """
+        username, repo_name = parse_repo_link(repo_link)
+        if state['sha'] == head_sha:
+            return state['text']
+
+        diff = fetch_changed_files(username, repo_name, state['sha'], head_sha, self.scraper.headers)
+        if diff is None:
+            return None
+
+        affected = affected_sections(diff)
+        section_map = README_SECTIONS if doc == 'readme' else REPORT_SECTIONS
+        sections = [(header, body, section_key(header, section_map))
+                    for header, body in split_sections(state['text'])]
+        # A change with no section to carry it would be dropped, then hidden for good by the new SHA
+        mapped = {key for _, _, key in sections if key}
+        if affected - {'contributors'} - mapped:
+            return None  # Fall back to a full run
+
+        inputs = state['inputs']
+        tree = None
+        if 'structure' in affected:
+            inputs['structure'], _, _, tree = self.scraper.scrape_repo_structure(repo_link, head_sha)
+        structure_str = json.dumps(inputs.get('structure', {}), indent=2)
+        excerpts_str, stats_str = self._repo_facts(username, repo_name, inputs.get('structure', {}),
+                                                   head_sha, repo_data, tree)
+        changed_files = '\n'.join(f"- {f['filename']} ({f['status']})" for f in diff['files'])
+
+        replacements = {}
+        for header, body, key in sections:
+            if key not in affected or key == 'contributors':
+                continue
+
+            prompt = f"""The {doc} below was generated for the GitHub repository: {repo_link}
+
+These files have changed since it was written:
+{changed_files}
+
+Repository Structure:
+{structure_str}
+
+Repository Statistics:
+{stats_str}
+
+Key File Excerpts:
+{excerpts_str}
+
+Rewrite only the following section so it reflects the changes. Keep the same header line
+and Markdown style, and return only the rewritten section.
+
+{header}
+{body}"""
+
+            section = clean_section(self.llm.generate(prompt, task='section'), header)
+            if section is None:
+                print(f"Rewrite of '{header}' didn't come back as that section, regenerating the {doc} in full")
+                return None
+            replacements[header] = section
+
+        # Contributor counts move with every commit, but the section is built locally
+        if doc == 'readme' and 'contributors' in affected:
+            contributors = repo_data.get('contributors', [])
+            if contributors:
+                inputs['contributors'] = contributors
+                replacements['## Contributors'] = self._contributors_section(contributors)
+
+        text = splice_sections(state['text'], replacements)
+        self.doc_store.save(username, repo_name, doc, head_sha, inputs, text)
+        return text
     
     def generate_report(self, repo_link):
         """Generate a very detailed project report with detailed insights."""
+        report_text, pdf_path = self.generate_report_files(repo_link)
+        if pdf_path is None:
+            return report_text
+        return f"{report_text}\n\n--- PDF Generated: {pdf_path} ---"
+
+    @profiled('report')
+    def generate_report_files(self, repo_link):
+        """Report text and the path of its PDF; the path is None when generation failed"""
         try:
-            # Scrape repository structure and get username/repo name
-            repo_structure, username, repo_name = self.scraper.scrape_repo_structure(repo_link)
-            structure_str = json.dumps(repo_structure, indent=2)
-
-            # Fetch repository metadata
-            repo_api_url = f"https://api.github.com/repos/{username}/{repo_name}"
-            repo_response = requests.get(repo_api_url)
-            repo_data = repo_response.json() if repo_response.status_code == 200 else {}
+            # Metadata, including the head commit, comes back in a single round trip
+            username, repo_name = parse_repo_link(repo_link)
+            repo_data = self.metadata.fetch(username, repo_name)
+            head_sha = repo_data.get('head_sha')
+
+            # Reuse the stored report when the repository hasn't moved, or patch only the affected sections
+            state = self.doc_store.load(username, repo_name, 'report')
+            if state and head_sha:
+                report_text = self._refresh_document(repo_link, 'report', state, head_sha, repo_data)
+                if report_text is not None:
+                    pdf_path = self.pdf_generator.generate_pdf(report_text, report_pdf_name(username, repo_name))
+                    return report_text, pdf_path
+
+            snapshot = self._snapshot(repo_link, head_sha, repo_data)
+            repo_structure = snapshot['structure']
 
             # Generate comprehensive project report
-            prompt = f"""Create a comprehensive project report for the GitHub repository: {repo_link}
+            prompt = f"""Create a comprehensive project report for the GitHub repository described above: {repo_link}
 
 Sections to include:
 1. 1st page: Cover Page
@@ -162,31 +352,28 @@ Sections to include:
 
 Provide insights, recommendations, and a professional assessment."""
 
-            response = self.model.generate_content(prompt)
-            report_text = response.text
+            report_text = self.llm.generate(prompt, context=snapshot['context'], task='report')
+            self.doc_store.save(username, repo_name, 'report', head_sha, {'structure': repo_structure}, report_text)
             
             # Generate PDF
-            pdf_path = self.pdf_generator.generate_pdf(report_text, f'{repo_name}_project_report.pdf')
+            pdf_path = self.pdf_generator.generate_pdf(report_text, report_pdf_name(username, repo_name))
             
             # Return both text and PDF path
-            return f"{report_text}\n\n--- PDF Generated: {pdf_path} ---"
+            return report_text, pdf_path
 
         except Exception as e:
-            return f"Error generating report: {str(e)}"
+            return f"Error generating report: {str(e)}", None
 
+    @profiled('assets')
     def generate_assets(self, repo_link):
         """Generate project visualization and marketing assets."""
         try:
-            # Scrape repository structure and get username/repo name
-            repo_structure, username, repo_name = self.scraper.scrape_repo_structure(repo_link)
-
-            # Fetch repository metadata
-            repo_api_url = f"https://api.github.com/repos/{username}/{repo_name}"
-            repo_response = requests.get(repo_api_url)
-            repo_data = repo_response.json() if repo_response.status_code == 200 else {}
+            username, repo_name = parse_repo_link(repo_link)
+            repo_data = self.metadata.fetch(username, repo_name)
+            snapshot = self._snapshot(repo_link, repo_data.get('head_sha'), repo_data)
 
             # Generate assets description prompt
-            prompt = f"""Generate a set of project assets for the GitHub repository: {repo_link}
+            prompt = f"""Generate a set of project assets for the GitHub repository described above: {repo_link}
 
 Assets to create:
 1. Project Logo Concept (SVG description)
@@ -200,39 +387,61 @@ Assets to create:
 
 Provide detailed descriptions and SVG/design concepts for each asset."""
 
-            response = self.model.generate_content(prompt)
-            return response.text
+            asset_descriptions = self.llm.generate(prompt, context=snapshot['context'], task='assets')
+
+            # Generate the project description against the same repository context
+            description_prompt = f"Generate a 100-word description explaining the system architecture and flowchart for the repository described above: {repo_link}"
+            description_text = self.llm.generate(description_prompt, context=snapshot['context'], task='description')
+
+            # Save the description in the repository's own assets folder
+            assets_dir = repo_assets_dir(username, repo_name)
+            os.makedirs(assets_dir, exist_ok=True)
+            description_filepath = os.path.join(assets_dir, 'description.txt')
+            with open(description_filepath, 'w', encoding='utf-8') as desc_file:
+                desc_file.write(description_text)
+
+            return f"{asset_descriptions}\n\n## System Description\n\n{description_text}"
 
         except Exception as e:
             return f"Error generating assets: {str(e)}"
 
+    @profiled('readme')
     def generate_readme(self, repo_link):
-        if not repo_link:
-            return "Please enter a GitHub repository link"
+        readme_text = ""
+        for readme_text in self._readme_steps(repo_link, stream=False):
+            pass
+        return readme_text
 
-        try:
-            # Scrape repository structure and get username/repo name
-            repo_structure, username, repo_name = self.scraper.scrape_repo_structure(repo_link)
-            structure_str = json.dumps(repo_structure, indent=2)
+    @profiled('readme')
+    def stream_readme(self, repo_link):
+        """Like generate_readme, but yields the README as the model writes it"""
+        yield from self._readme_steps(repo_link, stream=True)
 
-            # Fetch repository metadata
-            repo_api_url = f"https://api.github.com/repos/{username}/{repo_name}"
-            repo_response = requests.get(repo_api_url)
-            repo_data = repo_response.json() if repo_response.status_code == 200 else {}
+    def _readme_steps(self, repo_link, stream):
+        if not repo_link:
+            yield "Please enter a GitHub repository link"
+            return
 
-            # Fetch contributors
-            contributors = self.fetch_contributors(username, repo_name)
+        try:
+            # Metadata, including the head commit and contributors, comes back in a single round trip
+            username, repo_name = parse_repo_link(repo_link)
+            repo_data = self.metadata.fetch(username, repo_name)
+            head_sha = repo_data.get('head_sha')
+
+            # Reuse the stored README when the repository hasn't moved, or patch only the affected sections
+            state = self.doc_store.load(username, repo_name, 'readme')
+            if state and head_sha:
+                readme_text = self._refresh_document(repo_link, 'readme', state, head_sha, repo_data)
+                if readme_text is not None:
+                    yield readme_text
+                    return
+
+            snapshot = self._snapshot(repo_link, head_sha, repo_data)
+            repo_structure = snapshot['structure']
+            contributors = repo_data.get('contributors', [])
 
             # Generate README with comprehensive details
-            prompt = f"""Generate a comprehensive README.md for the GitHub repository: {repo_link}
-
-Repository Structure:
-{structure_str}
-
-Repository Metadata:
-- Stars: {repo_data.get('stargazers_count', 'N/A')}
-- Forks: {repo_data.get('forks_count', 'N/A')}
-- Primary Language: {repo_data.get('language', 'N/A')}
+            prompt = f"""Generate a comprehensive README.md for the GitHub repository described above: {repo_link}
 
 Create a README with these specific sections:
 1. Project Title and Brief Description
@@ -247,8 +456,13 @@ Create a README with these specific sections:
 
 Ensure the README is professional, informative, and well-structured."""
 
-            response = self.model.generate_content(prompt)
-            readme_text = response.text
+            if stream:
+                readme_text = ""
+                for chunk in self.llm.stream(prompt, context=snapshot['context'], task='readme'):
+                    readme_text += chunk
+                    yield readme_text
+            else:
+                readme_text = self.llm.generate(prompt, context=snapshot['context'], task='readme')
 
             # Remove any already generated license section
             license_header = "## License"
@@ -257,10 +471,7 @@ Ensure the README is professional, informative, and well-structured."""
 
             # Append Contributors section only if contributors exist
             if contributors:
-                contributors_section = "\n## Contributors\n\n"
-                for contrib in contributors:
-                    contributors_section += f"- [{contrib['login']}]({contrib['html_url']}) - {contrib['contributions']} contributions\n"
-                readme_text += contributors_section  # Add to README
+                readme_text += self._contributors_section(contributors)  # Add to README
 
             # Append MIT License
             mit_license = f"""\n## License
@@ -289,17 +500,39 @@ SOFTWARE."""
 
             readme_text += mit_license  # Append cleaned license
 
-            return readme_text
+            self.doc_store.save(username, repo_name, 'readme', head_sha, {
+                'structure': repo_structure,
+                'contributors': contributors,
+            }, readme_text)
+
+            yield readme_text
 
         except Exception as e:
-            return f"Error generating README: {str(e)}"
+            yield f"Error generating README: {str(e)}"
+
+# Opens /export/{owner}/{repo}.zip for the repository link, split the same way as parse_repo_link
+EXPORT_JS = """(link) => {
+    const parts = link.replace(/\\/+$/, '').split('/');
+    window.location.href = `/export/${parts[parts.length - 2]}/${parts[parts.length - 1]}.zip`;
+}"""
 
 # Gradio Interface
 def create_readme_app():
     load_dotenv()
     API_KEY = os.getenv("API-KEY")
+    FALLBACK_MODEL = os.getenv("FALLBACK-MODEL")
+    GITHUB_TOKEN = os.getenv("GITHUB-TOKEN")
     
-    generator = ReadmeGenerator(API_KEY)
+    generator = ReadmeGenerator(API_KEY, fallback_model=FALLBACK_MODEL, github_token=GITHUB_TOKEN)
+
+    # Keep caches warm from push webhooks when WEBHOOK-REPOS is configured
+    receiver = receiver_from_env(generator)
+    if receiver:
+        receiver.start()
+
+    settings = ServerSettings.from_env()
+    admission = AdmissionController(settings)
+    renderer = MarkdownPreviewRenderer()
     
     with gr.Blocks() as demo:
         gr.Markdown("# RepoRover : AI generated documentations for projects")
@@ -309,13 +542,14 @@ def create_readme_app():
             generate_btn = gr.Button("Generate README")
             report_btn = gr.Button("Generate Report")
             assets_btn = gr.Button("Generate Assets")
+            export_btn = gr.Button("Export Bundle")
         
         output_tabs = gr.Tabs()
         with output_tabs:
             with gr.TabItem("README"):
                 readme_output = gr.Textbox(label="README Content", lines=15)
                 preview_btn = gr.Button("Preview Markdown")
-                markdown_preview = gr.Markdown()
+                markdown_preview = gr.HTML()
             
             with gr.TabItem("Report"):
                 report_output = gr.Textbox(label="Project Report", lines=15)
@@ -324,22 +558,77 @@ def create_readme_app():
             with gr.TabItem("Assets"):
                 assets_output = gr.Textbox(label="Project Assets", lines=15)
 
-        generate_btn.click(generator.generate_readme, 
-                            inputs=repo_link, 
-                            outputs=readme_output)
+            with gr.TabItem("Server Status"):
+                status_btn = gr.Button("Refresh")
+                status_output = gr.Markdown()
+
+        # Each job is admitted by a cheap unqueued step, then queued under its own concurrency limit.
+        # README jobs and the expensive report/assets jobs use separate limits so one can't starve the other.
+        readme_ticket = gr.State()
+        report_ticket = gr.State()
+        assets_ticket = gr.State()
+
+        generate_btn.click(admission.admitter('readme'), outputs=readme_ticket, queue=False).success(
+            admission.wrap('readme', generator.stream_readme),
+            inputs=[readme_ticket, repo_link],
+            outputs=readme_output,
+            concurrency_limit=settings.readme_concurrency, concurrency_id='readme')
         
-        report_btn.click(generator.generate_report, 
-                          inputs=repo_link, 
-                          outputs=[report_output, pdf_output])
+        report_btn.click(admission.admitter('report'), outputs=report_ticket, queue=False).success(
+            admission.wrap('report', generator.generate_report_files),
+            inputs=[report_ticket, repo_link],
+            outputs=[report_output, pdf_output],
+            concurrency_limit=settings.heavy_concurrency, concurrency_id='heavy')
         
-        assets_btn.click(generator.generate_assets, 
-                          inputs=repo_link, 
-                          outputs=assets_output)
+        assets_btn.click(admission.admitter('assets'), outputs=assets_ticket, queue=False).success(
+            admission.wrap('assets', generator.generate_assets),
+            inputs=[assets_ticket, repo_link],
+            outputs=assets_output,
+            concurrency_limit=settings.heavy_concurrency, concurrency_id='heavy')
         
-        preview_btn.click(lambda text: text, inputs=readme_output, outputs=markdown_preview)
+        # The bundle is streamed by the /export route, so the browser just navigates to it
+        export_btn.click(None, inputs=repo_link, js=EXPORT_JS)
+
+        preview_btn.click(renderer.render, inputs=readme_output, outputs=markdown_preview, queue=False)
+        # Keep the preview live while the README streams in or is edited; unchanged blocks come from cache
+        readme_output.change(renderer.render, inputs=readme_output, outputs=markdown_preview,
+                             queue=False, show_progress="hidden")
+
+        def server_status():
+            llm = generator.llm.metrics()
+            p99 = f"{llm['p99']:.1f}s" if llm['p99'] is not None else '-'
+            return (f"{admission.metrics_markdown()}\n\n"
+                    f"Model calls: {llm['calls']}, retries: {llm['retries']}, "
+                    f"hedge rate: {llm['hedge_rate']:.0%}, hedge win rate: {llm['hedge_win_rate']:.0%}, "
+                    f"p99 latency: {p99}\n\n"
+                    f"Preview: last render {renderer.stats()['last_ms']:.1f} ms")
+
+        status_btn.click(server_status, outputs=status_output, queue=False)
+        # A tab closed while its job was still queued shouldn't keep holding the user's slot
+        demo.unload(admission.release_session)
+
+    # Gradio's own cap is a backstop; AdmissionController turns callers away first with a clearer message
+    demo.queue(max_size=settings.max_queue * 3)
     
     return demo
 
 if __name__ == "__main__":
-    app = create_readme_app()
-    app.launch()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="RepoRover web app, or a single job with --task")
+    parser.add_argument("--profile", action="store_true", help="save a profile of each job to outputs/profiles")
+    parser.add_argument("--task", choices=["readme", "report", "assets"], help="run one job instead of the app")
+    parser.add_argument("repo_link", nargs="?")
+    args = parser.parse_args()
+
+    if args.task:
+        load_dotenv()
+        generator = ReadmeGenerator(os.getenv("API-KEY"), fallback_model=os.getenv("FALLBACK-MODEL"),
+                                    github_token=os.getenv("GITHUB-TOKEN"),
+                                    profile=args.profile or None)
+        print(getattr(generator, f"generate_{args.task}")(args.repo_link))
+    else:
+        if args.profile:
+            os.environ["REPOROVER-PROFILE"] = "true"
+        # Gradio runs mounted inside a FastAPI app so the export bundle can be streamed from its own route
+        app = create_export_app(create_readme_app())
+        uvicorn.run(app, host=os.getenv("SERVER-HOST", "127.0.0.1"),
+                    port=int(os.getenv("SERVER-PORT", "7860")))
\ No newline at end of file
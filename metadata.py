@@ -0,0 +1,208 @@
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+GITHUB_API_URL = 'https://api.github.com'
+GITHUB_GRAPHQL_URL = 'https://api.github.com/graphql'
+
+# Repositories per GraphQL request in batch mode; keeps each query well under the node limit
+BATCH_SIZE = 20
+TOP_CONTRIBUTORS = 5
+# Contributor rankings kept with their ETag, so an unchanged ranking costs no rate limit
+MAX_CACHED_RANKINGS = 2000
+# Prefetched metadata is handed out by fetch() for this long, enough for one job's tasks
+PREFETCH_TTL_SECONDS = 10 * 60
+
+REPO_FIELDS = """
+fragment RepoFields on Repository {
+  stargazerCount
+  forkCount
+  createdAt
+  pushedAt
+  diskUsage
+  description
+  primaryLanguage { name }
+  languages(first: 10, orderBy: {field: SIZE, direction: DESC}) { edges { size node { name } } }
+  defaultBranchRef {
+    name
+    target { ... on Commit { oid } }
+  }
+}
+"""
+
+def build_query(repos: List[Tuple[str, str]]) -> Tuple[str, Dict]:
+    """One GraphQL document with an aliased `repository` field per repo"""
+    params, fields, variables = [], [], {}
+    for i, (owner, name) in enumerate(repos):
+        params.append(f'$o{i}: String!, $n{i}: String!')
+        fields.append(f'  r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...RepoFields }}')
+        variables[f'o{i}'] = owner
+        variables[f'n{i}'] = name
+
+    query = f"query({', '.join(params)}) {{\n" + '\n'.join(fields) + '\n}\n' + REPO_FIELDS
+    return query, variables
+
+def normalise_graphql(owner: str, name: str, node: Dict) -> Dict:
+    """Convert a GraphQL repository node into the REST field names the generators use.
+
+    GraphQL has no all-time contributors ranking, so `contributors` is filled
+    in separately from the REST endpoint.
+    """
+    branch = node.get('defaultBranchRef') or {}
+    target = branch.get('target') or {}
+    return {
+        'full_name': f'{owner}/{name}',
+        'description': node.get('description'),
+        'stargazers_count': node.get('stargazerCount'),
+        'forks_count': node.get('forkCount'),
+        'created_at': node.get('createdAt'),
+        'pushed_at': node.get('pushedAt'),
+        'size': node.get('diskUsage') or 0,
+        'language': (node.get('primaryLanguage') or {}).get('name'),
+        'languages': {edge['node']['name']: edge['size'] for edge in (node.get('languages') or {}).get('edges', [])},
+        'default_branch': branch.get('name'),
+        'head_sha': target.get('oid'),
+    }
+
+class GitHubMetadataFetcher:
+    """Repository metadata from one GraphQL query per batch, with REST as the fallback.
+
+    GraphQL has no all-time contributors ranking, so the top contributors come
+    from the REST `/contributors` endpoint, fetched alongside the query and
+    revalidated by ETag. GraphQL needs a token; without one (or when the query
+    fails) the REST endpoints are called concurrently instead. `api_url` and
+    `graphql_url` can point at a github_stub.StubGitHubServer for offline runs.
+    """
+
+    def __init__(self, github_token: Optional[str] = None, api_url: str = GITHUB_API_URL,
+                 graphql_url: str = GITHUB_GRAPHQL_URL, batch_size: int = BATCH_SIZE):
+        self.api_url = api_url.rstrip('/')
+        self.graphql_url = graphql_url
+        self.batch_size = batch_size
+        self.headers = {'Accept': 'application/vnd.github.v3+json'}
+        if github_token:
+            self.headers['Authorization'] = f'token {github_token}'
+        self.use_graphql = bool(github_token)
+        self._lock = threading.Lock()
+        self._rankings = {}
+        self._prefetched = {}
+
+    def fetch(self, username: str, repo_name: str) -> Dict:
+        with self._lock:
+            entry = self._prefetched.get((username, repo_name))
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return self.fetch_many([(username, repo_name)]).get((username, repo_name), {})
+
+    def prefetch(self, repos: List[Tuple[str, str]]):
+        """Fetch a batch ahead of jobs that will each call fetch() for one of them"""
+        results = self.fetch_many(repos)
+        expires_at = time.monotonic() + PREFETCH_TTL_SECONDS
+        with self._lock:
+            now = time.monotonic()
+            self._prefetched = {repo: entry for repo, entry in self._prefetched.items() if entry[1] > now}
+            for repo, data in results.items():
+                if data:
+                    self._prefetched[repo] = (data, expires_at)
+
+    def fetch_many(self, repos: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+        """Fetch metadata for several repositories, `batch_size` per GraphQL query"""
+        if not repos:
+            return {}
+        results = {}
+        with ThreadPoolExecutor(max_workers=min(len(repos), 8)) as executor:
+            # The ranking is REST-only whichever way the rest of the metadata comes
+            contributors = {repo: executor.submit(self._fetch_contributors, *repo) for repo in repos}
+            if self.use_graphql:
+                for i in range(0, len(repos), self.batch_size):
+                    results.update(self._fetch_graphql(repos[i:i + self.batch_size]))
+
+            missing = [repo for repo in repos if repo not in results]
+            for repo, data in zip(missing, executor.map(lambda r: self._fetch_rest(*r), missing)):
+                results[repo] = data
+            for repo, data in results.items():
+                if data:
+                    data['contributors'] = contributors[repo].result()
+        return results
+
+    def _fetch_graphql(self, repos: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+        query, variables = build_query(repos)
+        try:
+            response = requests.post(self.graphql_url, headers=self.headers,
+                                     json={'query': query, 'variables': variables})
+            if response.status_code != 200:
+                print(f"GraphQL metadata query failed ({response.status_code}), using REST")
+                return {}
+            data = response.json().get('data') or {}
+        except Exception as e:
+            print(f"GraphQL metadata query failed ({e}), using REST")
+            return {}
+
+        results = {}
+        for i, (owner, name) in enumerate(repos):
+            # Repositories that errored (not found, no access) are left for the REST fallback
+            if data.get(f'r{i}'):
+                results[(owner, name)] = normalise_graphql(owner, name, data[f'r{i}'])
+        return results
+
+    def _get_json(self, path: str, **kwargs):
+        response = requests.get(f'{self.api_url}{path}', headers=self.headers, **kwargs)
+        return response.json() if response.status_code == 200 else None
+
+    def _fetch_contributors(self, username: str, repo_name: str) -> List[Dict]:
+        """Top contributors by all-time contributions, a single small page.
+
+        The ranking is requested with the ETag of the last answer; GitHub
+        doesn't count a 304 against the rate limit, so refetching an unchanged
+        ranking is free.
+        """
+        key = (username, repo_name)
+        with self._lock:
+            etag, cached = self._rankings.get(key, (None, None))
+        headers = {**self.headers, 'If-None-Match': etag} if etag else self.headers
+        url = f'{self.api_url}/repos/{username}/{repo_name}/contributors'
+        try:
+            response = requests.get(url, headers=headers, params={'per_page': TOP_CONTRIBUTORS})
+            if response.status_code == 304:
+                return cached
+            if response.status_code != 200:
+                print(f"Error fetching contributors for {username}/{repo_name}: {response.status_code}")
+                return []
+            contributors = [{k: c[k] for k in ('login', 'html_url', 'contributions')}
+                            for c in response.json()[:TOP_CONTRIBUTORS]]
+        except Exception as e:
+            print(f"Error fetching contributors for {username}/{repo_name}: {e}")
+            return []
+
+        if response.headers.get('ETag'):
+            with self._lock:
+                self._rankings.pop(key, None)
+                self._rankings[key] = (response.headers['ETag'], contributors)
+                if len(self._rankings) > MAX_CACHED_RANKINGS:
+                    del self._rankings[next(iter(self._rankings))]
+        return contributors
+
+    def _fetch_rest(self, username: str, repo_name: str) -> Dict:
+        base = f'/repos/{username}/{repo_name}'
+        try:
+            # The endpoints are independent, so they are fetched side by side
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                repo_future = executor.submit(self._get_json, base)
+                languages_future = executor.submit(self._get_json, f'{base}/languages')
+                head_future = executor.submit(self._get_json, f'{base}/commits/HEAD')
+                repo_data = repo_future.result() or {}
+                languages = languages_future.result() or {}
+                head = head_future.result() or {}
+        except Exception as e:
+            print(f"Error fetching metadata for {username}/{repo_name}: {e}")
+            return {}
+
+        if not repo_data:
+            return {}
+        return {
+            **repo_data,
+            'languages': languages,
+            'head_sha': head.get('sha'),
+        }
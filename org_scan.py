@@ -0,0 +1,296 @@
+import os
+import json
+import math
+import time
+import argparse
+import threading
+import requests
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+from incremental import DocumentStore
+from github_api import fetch_paginated
+from metadata import BATCH_SIZE
+
+PROGRESS_FILE = os.path.join('.cache', 'org_scan', 'progress.json')
+
+# GitHub calls one task is assumed to cost: metadata, tree listings, compare, tarball and key file blobs
+GITHUB_CALLS_PER_TASK = 16
+# A truncated tree listing falls back to one contents call per directory, which grows with size
+KB_PER_EXTRA_CALL = 512
+MAX_EXTRA_CALLS = 500
+# Calls held back so the interactive app still works during a sweep
+GITHUB_RESERVE = 200
+# Without a token the limit is 60 an hour, so the reserve is capped to this share of the limit
+MAX_RESERVE_FRACTION = 0.25
+RATE_LIMIT_REFRESH_SECONDS = 60
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+def list_org_repos(org: str, headers: Dict = None) -> List[Dict]:
+    """All non-archived, non-fork repositories of an organisation, following pagination"""
+    url = f"https://api.github.com/orgs/{org}/repos"
+    repos = fetch_paginated(url, headers, params={'type': 'sources', 'sort': 'pushed'})
+    return [r for r in repos if not r.get('archived') and not r.get('fork')]
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait_for = (amount - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+class GitHubBudget:
+    """Shares the account's GitHub rate limit between all scan workers.
+
+    Jobs reserve an estimated number of calls up front and release them when
+    they finish; the real usage is read back from the free /rate_limit
+    endpoint every minute and after every job, minus what running jobs still
+    hold. When the remaining budget would dip below the reserve, callers wait
+    for the reset.
+    """
+
+    def __init__(self, headers: Dict = None, reserve: int = GITHUB_RESERVE):
+        self.headers = headers or {}
+        self.reserve = reserve
+        self.limit = None
+        self.remaining = 0
+        self.outstanding = 0
+        self.reset_at = 0.0
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        try:
+            response = requests.get("https://api.github.com/rate_limit", headers=self.headers)
+            core = response.json()['resources']['core']
+            self.limit = core['limit']
+            # Running jobs have spent part of their reservation at most, so count all of it as gone
+            self.remaining = core['remaining'] - self.outstanding
+            self.reset_at = float(core['reset'])
+        except Exception as e:
+            print(f"Could not read GitHub rate limit: {e}")
+            self.remaining = max(self.remaining, self._reserve() + GITHUB_CALLS_PER_TASK)
+            self.reset_at = time.time() + RATE_LIMIT_REFRESH_SECONDS
+        self.checked_at = time.monotonic()
+
+    def _reserve(self) -> int:
+        if self.limit is None:
+            return self.reserve
+        return min(self.reserve, int(self.limit * MAX_RESERVE_FRACTION))
+
+    def release(self, calls: int):
+        """End a reservation and re-read what GitHub reports as remaining"""
+        with self._lock:
+            self.outstanding -= calls
+            self._refresh()
+
+    def acquire(self, calls: int = GITHUB_CALLS_PER_TASK) -> int:
+        """Block until `calls` fit in the budget; returns the number reserved, to pass to release()"""
+        while True:
+            with self._lock:
+                if time.monotonic() - self.checked_at > RATE_LIMIT_REFRESH_SECONDS:
+                    self._refresh()
+                reserve = self._reserve()
+                if self.limit is not None:
+                    # An estimate above what a whole window allows would never fit
+                    calls = min(calls, max(self.limit - reserve, 1))
+                if self.remaining - calls >= reserve:
+                    self.remaining -= calls
+                    self.outstanding += calls
+                    return calls
+                wait_for = max(self.reset_at - time.time(), 1)
+                # Force a fresh reading once the window has reset
+                self.checked_at = 0.0
+            print(f"GitHub budget exhausted, waiting {wait_for:.0f}s for the rate limit reset")
+            time.sleep(wait_for)
+
+class OrgScanner:
+    """Generates docs for every repository of several organisations under shared budgets.
+
+    Repositories are ranked per organisation by staleness, stars and last push,
+    then dispatched round-robin across organisations so a large organisation
+    can't starve a small one. Metadata for the next BATCH_SIZE jobs is fetched
+    in one GraphQL query ahead of them. Finished repositories are recorded in
+    a progress file, so an interrupted sweep resumes where it stopped.
+    """
+
+    def __init__(self, generator, github_headers: Dict = None, tasks=('readme',),
+                 workers: int = 8, llm_rpm: float = 60, progress_file: str = PROGRESS_FILE):
+        self.generator = generator
+        self.github_headers = github_headers or {}
+        self.tasks = tasks
+        self.workers = workers
+        self.github_budget = GitHubBudget(self.github_headers)
+        self.llm_budget = TokenBucket(rate=llm_rpm / 60.0, capacity=max(1.0, llm_rpm / 6.0))
+        # Every model request, including per-section refreshes, retries and hedges, draws from the bucket
+        self.generator.llm.rate_limiter = self.llm_budget
+        self.progress_file = progress_file
+        self.doc_store = DocumentStore()
+        self.progress = self._load_progress()
+        self._lock = threading.Lock()
+
+    def _load_progress(self) -> Dict:
+        if os.path.exists(self.progress_file):
+            with open(self.progress_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def _save_progress(self):
+        os.makedirs(os.path.dirname(self.progress_file), exist_ok=True)
+        tmp_path = f'{self.progress_file}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.progress, f, indent=2)
+        os.replace(tmp_path, self.progress_file)
+
+    def score(self, repo: Dict, now: float) -> Optional[float]:
+        """Higher runs first; None means the stored docs are already current"""
+        pushed_at = _parse_time(repo.get('pushed_at')) or now
+        done = self.progress.get(repo['full_name'], {})
+        if done.get('status') == 'done' and done.get('pushed_at') == repo.get('pushed_at'):
+            return None
+
+        owner, name = repo['full_name'].split('/')
+        state = self.doc_store.load(owner, name, self.tasks[0])
+        if state is None:
+            staleness = 100.0
+        elif state['generated_at'] >= pushed_at:
+            return None
+        else:
+            staleness = min((pushed_at - state['generated_at']) / 86400, 90.0)
+
+        stars = 10 * math.log10(repo.get('stargazers_count', 0) + 1)
+        recency = max(0.0, 30 - (now - pushed_at) / 86400) / 3
+        return staleness + stars + recency
+
+    def plan(self, orgs: List[str]) -> Dict[str, List[Dict]]:
+        """Per organisation, the repositories needing work, best first"""
+        now = time.time()
+        queues = {}
+        for org in orgs:
+            calls = self.github_budget.acquire(1)
+            try:
+                repos = list_org_repos(org, self.github_headers)
+            finally:
+                self.github_budget.release(calls)
+            scored = []
+            for repo in repos:
+                if repo.get('size', 0) == 0:
+                    continue  # Empty repositories have nothing to document
+                score = self.score(repo, now)
+                if score is not None:
+                    scored.append((score, repo))
+            queues[org] = [repo for _, repo in sorted(scored, key=lambda x: -x[0])]
+            print(f"{org}: {len(queues[org])} repositories to process")
+        return queues
+
+    @staticmethod
+    def _fair_order(queues: Dict[str, List[Dict]]):
+        """Yield repositories round-robin across organisations"""
+        positions = {org: 0 for org in queues}
+        while positions:
+            for org in list(positions):
+                if positions[org] >= len(queues[org]):
+                    del positions[org]
+                    continue
+                yield queues[org][positions[org]]
+                positions[org] += 1
+
+    def estimate_calls(self, repo: Dict) -> int:
+        """GitHub calls to reserve for a repository job before it starts"""
+        extra = min(repo.get('size', 0) // KB_PER_EXTRA_CALL, MAX_EXTRA_CALLS)
+        return GITHUB_CALLS_PER_TASK * len(self.tasks) + extra
+
+    def _prefetch_metadata(self, repos: List[Dict]):
+        """Metadata for the next jobs in one GraphQL query, rather than one query per job"""
+        calls = self.github_budget.acquire(1 + len(repos))
+        try:
+            self.generator.metadata.prefetch([tuple(repo['full_name'].split('/')) for repo in repos])
+        finally:
+            self.github_budget.release(calls)
+
+    def _run_job(self, repo: Dict) -> bool:
+        calls = self.github_budget.acquire(self.estimate_calls(repo))
+        try:
+            for task in self.tasks:
+                generate = getattr(self.generator, f'generate_{task}')
+                result = generate(repo['html_url'])
+                if result.startswith('Error generating'):
+                    print(f"{repo['full_name']}: {result}")
+                    return False
+            return True
+        finally:
+            # Debit what the job really used rather than trusting the estimate
+            self.github_budget.release(calls)
+
+    def run(self, orgs: List[str]) -> Dict:
+        order = list(self._fair_order(self.plan(orgs)))
+        counts = {'done': 0, 'failed': 0}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = {}
+            for i, repo in enumerate(order):
+                if i % BATCH_SIZE == 0:
+                    self._prefetch_metadata(order[i:i + BATCH_SIZE])
+                # Keep at most `workers` jobs submitted so fairness holds across the whole sweep
+                if len(in_flight) >= self.workers:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._record(in_flight.pop(future), future, counts)
+                in_flight[executor.submit(self._run_job, repo)] = repo
+
+            wait(in_flight)
+            for future, repo in in_flight.items():
+                self._record(repo, future, counts)
+        return counts
+
+    def _record(self, repo: Dict, future, counts: Dict):
+        ok = future.exception() is None and future.result()
+        if future.exception() is not None:
+            print(f"{repo['full_name']}: {future.exception()}")
+        with self._lock:
+            counts['done' if ok else 'failed'] += 1
+            self.progress[repo['full_name']] = {
+                'status': 'done' if ok else 'failed',
+                'pushed_at': repo.get('pushed_at'),
+                'finished_at': int(time.time()),
+            }
+            self._save_progress()
+            finished = counts['done'] + counts['failed']
+        if finished % 25 == 0:
+            print(f"Progress: {counts['done']} done, {counts['failed']} failed")
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from main import ReadmeGenerator
+
+    parser = argparse.ArgumentParser(description="Generate docs for every repository in GitHub organisations")
+    parser.add_argument("orgs", nargs="+")
+    parser.add_argument("--tasks", default="readme", help="comma-separated: readme,report,assets")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--llm-rpm", type=float, default=60, help="model requests per minute across all workers")
+    args = parser.parse_args()
+
+    load_dotenv()
+    generator = ReadmeGenerator(os.getenv("API-KEY"), fallback_model=os.getenv("FALLBACK-MODEL"),
+                                github_token=os.getenv("GITHUB-TOKEN"))
+    scanner = OrgScanner(generator, generator.scraper.headers, tasks=tuple(args.tasks.split(',')),
+                         workers=args.workers, llm_rpm=args.llm_rpm)
+    print(scanner.run(args.orgs))
@@ -0,0 +1,115 @@
+import re
+import html
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+try:
+    from markdown_it import MarkdownIt
+except ImportError:  # Gradio ships markdown-it-py, but fall back to escaped text without it
+    MarkdownIt = None
+
+LIST_ITEM = re.compile(r'^\s*([-*+]|\d+[.)])\s')
+REFERENCE_DEFINITION = re.compile(r'^ {0,3}\[[^\]]+\]:', re.M)
+# Brackets that could be a reference-style link or image: [text][label], [label][] or [label]
+REFERENCE_USE = re.compile(r'\]\s*\[|\[[^\]]+\](?![(:])')
+
+def split_blocks(text: str) -> List[str]:
+    """Split Markdown into top-level blocks that render independently.
+
+    Blocks break on blank lines, except inside fenced code, and consecutive
+    list blocks stay together so a loose list still renders as one list.
+    """
+    blocks, current = [], []
+    in_fence = False
+    for line in text.split('\n'):
+        if line.lstrip().startswith(('```', '~~~')):
+            in_fence = not in_fence
+        if not in_fence and not line.strip():
+            if current:
+                blocks.append('\n'.join(current))
+                current = []
+            continue
+        current.append(line)
+    if current:
+        blocks.append('\n'.join(current))
+
+    merged = []
+    for block in blocks:
+        continues_list = LIST_ITEM.match(block) or block.startswith(('  ', '\t'))
+        if merged and continues_list and LIST_ITEM.match(merged[-1]):
+            merged[-1] = f'{merged[-1]}\n\n{block}'
+        else:
+            merged.append(block)
+    return merged
+
+class MarkdownPreviewRenderer:
+    """Server-side Markdown to HTML with a block-level cache keyed by block hash.
+
+    While a README is edited or streamed in, almost every block is unchanged
+    from the previous render, so only new or edited blocks go through the
+    Markdown parser. Link reference definitions are collected from the whole
+    document and passed to every block, so `[docs][1]` resolves against a
+    `[1]: url` defined elsewhere.
+    """
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._parser = MarkdownIt('commonmark', {'html': False}).enable('table') if MarkdownIt else None
+        self._stats = {'renders': 0, 'blocks_rendered': 0, 'blocks_cached': 0, 'last_ms': 0.0}
+
+    def _references(self, blocks: List[str]) -> Dict:
+        """Link reference definitions of the whole document, keyed the way markdown-it looks them up"""
+        env = {}
+        if self._parser is not None:
+            for block in blocks:
+                if REFERENCE_DEFINITION.search(block):
+                    self._parser.parse(block, env)
+        return env.get('references', {})
+
+    def _render_block(self, block: str, references: Dict) -> str:
+        if self._parser is None:
+            return f'<pre>{html.escape(block)}</pre>'
+        return self._parser.render(block, {'references': dict(references)})
+
+    def render(self, text: str) -> str:
+        start = time.perf_counter()
+        parts = []
+        rendered = cached = 0
+        blocks = split_blocks(text or '')
+        references = self._references(blocks)
+        references_key = json.dumps(references, sort_keys=True) if references else ''
+        for block in blocks:
+            # Only blocks that may use a reference depend on the definitions
+            source = f'{block}\0{references_key}' if references_key and REFERENCE_USE.search(block) else block
+            key = hashlib.sha1(source.encode('utf-8')).hexdigest()
+            with self._lock:
+                block_html = self._cache.get(key)
+                if block_html is not None:
+                    self._cache.move_to_end(key)
+            if block_html is None:
+                block_html = self._render_block(block, references)
+                rendered += 1
+                with self._lock:
+                    self._cache[key] = block_html
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            else:
+                cached += 1
+            parts.append(block_html)
+
+        with self._lock:
+            self._stats['renders'] += 1
+            self._stats['blocks_rendered'] += rendered
+            self._stats['blocks_cached'] += cached
+            self._stats['last_ms'] = (time.perf_counter() - start) * 1000
+        return '\n'.join(parts)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
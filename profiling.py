@@ -0,0 +1,256 @@
+import io
+import os
+import re
+import sys
+import time
+import pstats
+import cProfile
+import inspect
+import functools
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+PROFILE_DIR = os.path.join('outputs', 'profiles')
+# Rows listed in the summary for functions and for allocation sites
+SUMMARY_ROWS = 25
+# Seconds between stack samples of the job's threads
+SAMPLE_INTERVAL = 0.005
+
+# cProfile and tracemalloc are process-wide, so only one job is profiled at a time
+_profile_lock = threading.Lock()
+
+def profiling_enabled() -> bool:
+    return os.getenv("REPOROVER-PROFILE", "false").lower() == "true"
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+class StackSampler:
+    """Samples the stacks of a job's thread and of busy pool threads.
+
+    cProfile only sees the thread that enabled it, while model calls, blob
+    fetches and REST metadata run on ThreadPoolExecutor workers. Sampling
+    `sys._current_frames()` covers those too; idle pool workers are skipped.
+    Stacks are kept in folded form (`thread;outer;...;inner count`), which
+    flamegraph.pl, inferno and speedscope read directly.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.job_threads = set()
+        self.recording = False
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            if not self.recording:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, '')
+                if ident not in self.job_threads and not name.startswith('ThreadPoolExecutor'):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                # A pool worker blocked on its (C-level) work queue has nothing to do
+                if stack[-1].startswith('_worker (thread.py'):
+                    continue
+                # Group pool workers by pool: ThreadPoolExecutor-2_5 -> ThreadPoolExecutor-2
+                thread = 'job' if ident in self.job_threads else re.sub(r'_\d+$', '', name)
+                self.stacks[';'.join([thread] + stack)] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def top(self, rows: int, inclusive: bool = False):
+        """(function, samples) with the most samples on top of the stack, or anywhere on it"""
+        counts = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(';')[1:]
+            for label in (set(frames) if inclusive else frames[-1:]):
+                counts[label] += count
+        return counts.most_common(rows)
+
+class JobProfiler:
+    """cProfile, stack sampling and tracemalloc around one generator job.
+
+    On finish it writes `{repo}_{task}_{timestamp}.prof` (cProfile of the
+    job's own thread; open with snakeviz), a `.folded` file of stack samples
+    from the job's thread and the pool threads it hands work to (render as a
+    flamegraph), the final tracemalloc snapshot, and a `.txt` summary of the
+    top functions and the allocation sites that grew most during the job.
+    When disabled, or while another job is being profiled, it does nothing.
+    """
+
+    def __init__(self, task: str, repo_link: str, enabled: bool = True,
+                 out_dir: str = PROFILE_DIR, rows: int = SUMMARY_ROWS):
+        self.task = task
+        self.repo_link = repo_link or ''
+        self.enabled = enabled
+        self.out_dir = out_dir
+        self.rows = rows
+        self.active = False
+        self._profile = None
+        self._sampler = None
+        self._started_tracing = False
+        self._start_snapshot = None
+        self._started_at = 0.0
+
+    def __enter__(self):
+        self.start()
+        self._resume()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._pause()
+        self.finish()
+        return False
+
+    def start(self):
+        if not self.enabled:
+            return
+        if not _profile_lock.acquire(blocking=False):
+            print(f"Another job is being profiled, running {self.task} without profiling")
+            return
+        self.active = True
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._profile = cProfile.Profile()
+        self._sampler = StackSampler()
+        self._sampler.start()
+        self._started_at = time.perf_counter()
+
+    def _resume(self):
+        if self.active:
+            # Streaming jobs may be resumed on a different worker thread each time
+            self._sampler.job_threads.add(threading.get_ident())
+            self._sampler.recording = True
+            self._profile.enable()
+
+    def _pause(self):
+        if self.active:
+            self._profile.disable()
+            self._sampler.recording = False
+            self._sampler.job_threads.discard(threading.get_ident())
+
+    def iterate(self, steps: Iterator) -> Iterator:
+        """Profile a streaming job; only the time spent producing each value is counted"""
+        self.start()
+        try:
+            while True:
+                self._resume()
+                try:
+                    value = next(steps)
+                except StopIteration:
+                    return
+                finally:
+                    self._pause()
+                yield value
+        finally:
+            self.finish()
+
+    def _base_path(self) -> str:
+        repo_name = self.repo_link.rstrip('/').split('/')[-1] or 'unknown'
+        repo_name = re.sub(r'[^A-Za-z0-9_.-]', '_', repo_name)
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        return os.path.join(self.out_dir, f'{repo_name}_{self.task}_{timestamp}')
+
+    def finish(self) -> Optional[str]:
+        """Write the profile, snapshot and summary; returns the summary path"""
+        if not self.active:
+            return None
+        self.active = False
+        try:
+            self._sampler.stop()
+            elapsed = time.perf_counter() - self._started_at
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            ])
+            if self._started_tracing:
+                tracemalloc.stop()
+
+            os.makedirs(self.out_dir, exist_ok=True)
+            base_path = self._base_path()
+            self._profile.dump_stats(f'{base_path}.prof')
+            snapshot.dump(f'{base_path}.tracemalloc')
+            with open(f'{base_path}.folded', 'w', encoding='utf-8') as f:
+                f.write(self._sampler.folded())
+
+            functions = io.StringIO()
+            pstats.Stats(self._profile, stream=functions).sort_stats('tottime').print_stats(self.rows)
+            allocations = snapshot.compare_to(self._start_snapshot, 'lineno')[:self.rows]
+
+            summary_path = f'{base_path}.txt'
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                f.write(f"Job: {self.task} {self.repo_link}\n")
+                f.write(f"Wall time: {elapsed:.2f}s, traced memory peak: {peak / 2**20:.1f} MiB\n")
+                f.write("Pool threads and allocations shared with jobs running at the same time are included.\n\n")
+
+                samples = sum(self._sampler.stacks.values()) or 1
+                f.write(f"Top {self.rows} functions across the job's threads, by samples on top of the stack "
+                        f"({self._sampler.samples} samples every {SAMPLE_INTERVAL * 1000:.0f} ms)\n")
+                for label, count in self._sampler.top(self.rows):
+                    f.write(f"{count / samples:7.1%}  {label}\n")
+                f.write(f"\nTop {self.rows} functions across the job's threads, including callees\n")
+                for label, count in self._sampler.top(self.rows, inclusive=True):
+                    f.write(f"{count / samples:7.1%}  {label}\n")
+
+                f.write(f"\nTop {self.rows} functions by self time in the job's own thread (cProfile)\n")
+                f.write(functions.getvalue())
+                f.write(f"\nTop {self.rows} allocation sites by growth during the job\n")
+                for stat in allocations:
+                    f.write(f"{stat}\n")
+            print(f"Profile for {self.task} saved to {summary_path}")
+            return summary_path
+        except Exception as e:
+            print(f"Error saving profile: {e}")
+            return None
+        finally:
+            self._profile = None
+            self._sampler = None
+            self._start_snapshot = None
+            _profile_lock.release()
+
+def profiled(task: str) -> Callable:
+    """Decorate a generator job `method(self, repo_link, ...)`; profiles when `self.profile` is set"""
+    def decorate(method):
+        # Streaming jobs stay generator functions so Gradio still streams them
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def stream_wrapper(self, repo_link, *args, **kwargs):
+                profiler = JobProfiler(task, repo_link, enabled=self.profile)
+                yield from profiler.iterate(method(self, repo_link, *args, **kwargs))
+            return stream_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, repo_link, *args, **kwargs):
+            with JobProfiler(task, repo_link, enabled=self.profile):
+                return method(self, repo_link, *args, **kwargs)
+        return wrapper
+    return decorate
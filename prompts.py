@@ -0,0 +1,31 @@
+import json
+from typing import Dict
+
+def build_repo_context(repo_link: str, structure: Dict, repo_data: Dict,
+                       stats_str: str, excerpts_str: str) -> str:
+    """Canonical repository context shared by every task prompt.
+
+    Everything is serialised deterministically, so the same snapshot always
+    gives byte-identical text and can be registered once as cached context.
+    """
+    structure_str = json.dumps(structure, sort_keys=True, separators=(',', ':'))
+    return f"""GitHub Repository: {repo_link}
+
+Repository Structure:
+{structure_str}
+
+Repository Metadata:
+- Stars: {repo_data.get('stargazers_count', 'N/A')}
+- Forks: {repo_data.get('forks_count', 'N/A')}
+- Primary Language: {repo_data.get('language', 'N/A')}
+- Created: {(repo_data.get('created_at') or 'N/A')[:10]}
+
+Repository Statistics:
+{stats_str}
+
+Key File Excerpts:
+{excerpts_str}"""
+
+def assemble(context: str, task: str) -> str:
+    """Inline form of a task prompt for backends without cached context"""
+    return f"{context}\n\n---\n\n{task}"
@@ -0,0 +1,174 @@
+import os
+import base64
+import tempfile
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from incremental import DEPENDENCY_FILES, USAGE_FILES, CONFIG_EXTENSIONS
+from github_api import fetch_tree, tree_blobs
+
+BLOB_CACHE_DIR = os.path.join('.cache', 'blobs')
+
+SOURCE_EXTENSIONS = ('.py', '.js', '.ts', '.go', '.rs', '.java', '.rb', '.php', '.c', '.cpp', '.sh')
+BINARY_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.pdf', '.zip', '.gz', '.tar', '.mp3', '.mp4',
+    '.pt', '.pth', '.onnx', '.h5', '.pkl', '.npy', '.cache', '.bin', '.so', '.exe',
+)
+
+# Blobs bigger than this are never worth downloading for a few KB of excerpt
+MAX_BLOB_SIZE = 64 * 1024
+
+def flatten_structure(structure: Dict, prefix: str = '') -> List[str]:
+    """Turn a scraped {'files', 'directories'} tree into a list of paths"""
+    paths = [f'{prefix}{name}' for name in structure.get('files', [])]
+    for dir_name, contents in structure.get('directories', {}).items():
+        paths.extend(flatten_structure(contents, f'{prefix}{dir_name}/'))
+    return paths
+
+class KeyFileSampler:
+    """Fetches trimmed excerpts of a repository's key files, caching blobs by git SHA.
+
+    `byte_budget` caps the excerpt text handed to the model and
+    `download_budget` caps the bytes of uncached blobs downloaded per sample,
+    since a whole blob is fetched even when only its start is used.
+    """
+
+    def __init__(self, headers: Dict = None, cache_dir: str = BLOB_CACHE_DIR,
+                 byte_budget: int = 16000, excerpt_bytes: int = 4000,
+                 download_budget: int = 128 * 1024,
+                 max_files: int = 8, max_workers: int = 4):
+        self.headers = headers or {}
+        self.cache_dir = cache_dir
+        self.byte_budget = byte_budget
+        self.download_budget = download_budget
+        self.excerpt_bytes = excerpt_bytes
+        self.max_files = max_files
+        self.max_workers = max_workers
+
+    @staticmethod
+    def score(path: str) -> int:
+        name = os.path.basename(path)
+        if name.endswith(BINARY_EXTENSIONS):
+            return 0
+
+        if name in DEPENDENCY_FILES:
+            score = 100
+        elif name in USAGE_FILES:
+            score = 80
+        elif name.lower().startswith('readme'):
+            score = 60
+        elif name.endswith(CONFIG_EXTENSIONS):
+            score = 50
+        elif name.endswith(SOURCE_EXTENSIONS):
+            score = 30
+        else:
+            return 0
+
+        # Prefer files close to the repository root
+        return max(score - 15 * path.count('/'), 1)
+
+    def rank_files(self, structure: Dict) -> List[str]:
+        scored = [(self.score(path), path) for path in flatten_structure(structure)]
+        return [path for score, path in sorted(scored, key=lambda x: (-x[0], x[1])) if score > 0]
+
+    def fetch_tree(self, username: str, repo_name: str, ref: str = 'HEAD') -> Dict[str, Dict]:
+        """Map every blob path to its SHA and size with a single recursive tree call"""
+        try:
+            data = fetch_tree(f"https://api.github.com/repos/{username}/{repo_name}", ref, self.headers)
+        except Exception as e:
+            print(f"Error listing the tree of {username}/{repo_name}: {e}")
+            return {}
+        return tree_blobs(data.get('tree', [])) if data else {}
+
+    def _cache_path(self, sha: str) -> str:
+        return os.path.join(self.cache_dir, sha[:2], sha)
+
+    def _fetch_blob(self, username: str, repo_name: str, sha: str) -> Optional[bytes]:
+        cache_path = self._cache_path(sha)
+        if os.path.exists(cache_path):
+            with open(cache_path, 'rb') as f:
+                return f.read()
+
+        url = f"https://api.github.com/repos/{username}/{repo_name}/git/blobs/{sha}"
+        try:
+            response = requests.get(url, headers=self.headers)
+            if response.status_code != 200:
+                print(f"Error accessing {url}: {response.status_code}")
+                return None
+            content = base64.b64decode(response.json().get('content', ''))
+        except Exception as e:
+            print(f"Error accessing {url}: {e}")
+            return None
+
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            # Concurrent jobs may fetch the same blob, so each writes its own temp file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not cache blob {sha}: {e}")
+        return content
+
+    @staticmethod
+    def trim(content: bytes, limit: int) -> str:
+        text = content.decode('utf-8', errors='replace')
+        if len(text) <= limit:
+            return text.rstrip()
+        # Cut on a line boundary so the excerpt doesn't end mid-statement
+        cut = text.rfind('\n', 0, limit)
+        return text[:cut if cut > 0 else limit].rstrip() + '\n...'
+
+    def select(self, structure: Dict, tree: Dict[str, Dict]) -> List[Dict]:
+        """Pick the highest ranked files that fit in the excerpt and download budgets"""
+        selected = []
+        seen_shas = set()
+        remaining = self.byte_budget
+        downloads_left = self.download_budget
+        for path in self.rank_files(structure):
+            if len(selected) >= self.max_files or remaining <= 0:
+                break
+            blob = tree.get(path)
+            if not blob or blob['size'] == 0 or blob['size'] > MAX_BLOB_SIZE:
+                continue
+            # Identical files share a blob; one excerpt of it is enough
+            if blob['sha'] in seen_shas:
+                continue
+            # Cached blobs cost nothing to read again
+            if not os.path.exists(self._cache_path(blob['sha'])):
+                if blob['size'] > downloads_left:
+                    continue
+                downloads_left -= blob['size']
+
+            limit = min(blob['size'], self.excerpt_bytes, remaining)
+            selected.append({'path': path, 'sha': blob['sha'], 'limit': limit})
+            seen_shas.add(blob['sha'])
+            remaining -= limit
+
+        return selected
+
+    def sample(self, username: str, repo_name: str, structure: Dict, ref: str = None,
+               tree: Dict[str, Dict] = None) -> List[Dict]:
+        """Return [{'path', 'excerpt'}] for the key files of a repository"""
+        if tree is None:
+            tree = self.fetch_tree(username, repo_name, ref or 'HEAD')
+        selected = self.select(structure, tree)
+        if not selected:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            blobs = list(executor.map(
+                lambda item: self._fetch_blob(username, repo_name, item['sha']), selected
+            ))
+
+        return [
+            {'path': item['path'], 'excerpt': self.trim(content, item['limit'])}
+            for item, content in zip(selected, blobs) if content is not None
+        ]
+
+    @staticmethod
+    def format_excerpts(samples: List[Dict]) -> str:
+        if not samples:
+            return 'N/A'
+        return '\n\n'.join(f"--- {item['path']} ---\n{item['excerpt']}" for item in samples)
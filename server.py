@@ -0,0 +1,183 @@
+import os
+import math
+import time
+import uuid
+import inspect
+import threading
+from collections import deque
+from typing import Callable, Dict
+import gradio as gr
+
+# Longest one job is expected to take; bounds how long a ticket may legitimately wait
+MAX_JOB_SECONDS = 10 * 60
+
+class ServerSettings:
+    """Queue and concurrency settings for the web app, read from .env"""
+
+    def __init__(self, readme_concurrency: int = 4, heavy_concurrency: int = 1,
+                 max_queue: int = 32, max_jobs_per_user: int = 1):
+        self.readme_concurrency = readme_concurrency
+        self.heavy_concurrency = heavy_concurrency
+        self.max_queue = max_queue
+        self.max_jobs_per_user = max_jobs_per_user
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            readme_concurrency=int(os.getenv("README-CONCURRENCY", "4")),
+            heavy_concurrency=int(os.getenv("HEAVY-CONCURRENCY", "1")),
+            max_queue=int(os.getenv("MAX-QUEUE", "32")),
+            max_jobs_per_user=int(os.getenv("MAX-JOBS-PER-USER", "1")),
+        )
+
+    def concurrency(self, kind: str) -> int:
+        return self.readme_concurrency if kind == 'readme' else self.heavy_concurrency
+
+class AdmissionController:
+    """Back-pressure in front of Gradio's queue.
+
+    Each job is admitted by a cheap unqueued event before the real handler is
+    queued. Admission is refused with a clear message when a job kind already
+    has `max_queue` jobs waiting, or when the user already has
+    `max_jobs_per_user` jobs in flight, so one user can't fill the queue.
+    The time between admission and the handler starting is recorded as the
+    queue wait. Users are told apart by login or browser session rather than
+    IP, since behind a reverse proxy every visitor shares one address.
+
+    Queued tickets are dropped when their browser session unloads. As a
+    backstop for a missed unload, a ticket expires only after waiting longer
+    than a full queue ahead of it could take.
+    """
+
+    def __init__(self, settings: ServerSettings):
+        self.settings = settings
+        self._lock = threading.Lock()
+        self._tickets = {}
+        self._waits = {}
+        self._counters = {}
+
+    @staticmethod
+    def _user(request: gr.Request) -> str:
+        if request is None:
+            return 'anonymous'
+        if getattr(request, 'username', None):
+            return request.username
+        if getattr(request, 'session_hash', None):
+            return request.session_hash
+        client = getattr(request, 'client', None)
+        return getattr(client, 'host', None) or 'anonymous'
+
+    def ticket_ttl(self, kind: str) -> float:
+        """Seconds a queued ticket may wait: `max_queue` jobs ahead of it plus its own turn"""
+        rounds = math.ceil(self.settings.max_queue / max(self.settings.concurrency(kind), 1)) + 1
+        return rounds * MAX_JOB_SECONDS
+
+    def _expire(self, now: float):
+        for ticket_id, ticket in list(self._tickets.items()):
+            if ticket['started_at'] is None and now - ticket['admitted_at'] > self.ticket_ttl(ticket['kind']):
+                del self._tickets[ticket_id]
+
+    def _count(self, kind: str, name: str):
+        counters = self._counters.setdefault(kind, {'admitted': 0, 'rejected_busy': 0, 'rejected_user': 0})
+        counters[name] += 1
+
+    def admit(self, kind: str, request: gr.Request = None) -> str:
+        now = time.monotonic()
+        user = self._user(request)
+        with self._lock:
+            self._expire(now)
+            waiting = sum(1 for t in self._tickets.values() if t['kind'] == kind and t['started_at'] is None)
+            if waiting >= self.settings.max_queue:
+                self._count(kind, 'rejected_busy')
+                raise gr.Error("RepoRover is busy right now, please try again in a minute.")
+
+            user_jobs = sum(1 for t in self._tickets.values() if t['user'] == user)
+            if user_jobs >= self.settings.max_jobs_per_user:
+                self._count(kind, 'rejected_user')
+                raise gr.Error("You already have a job running, please wait for it to finish.")
+
+            ticket_id = uuid.uuid4().hex
+            self._tickets[ticket_id] = {
+                'kind': kind, 'user': user, 'session': getattr(request, 'session_hash', None),
+                'admitted_at': now, 'started_at': None,
+            }
+            self._count(kind, 'admitted')
+        return ticket_id
+
+    def admitter(self, kind: str) -> Callable:
+        def admit(request: gr.Request):
+            return self.admit(kind, request)
+        return admit
+
+    def release_session(self, request: gr.Request = None):
+        """Drop the queued tickets of a browser session that went away; wired to `demo.unload`"""
+        session = getattr(request, 'session_hash', None)
+        if not session:
+            return
+        with self._lock:
+            for ticket_id, ticket in list(self._tickets.items()):
+                if ticket['session'] == session and ticket['started_at'] is None:
+                    del self._tickets[ticket_id]
+
+    def _start(self, kind: str, ticket_id: str):
+        with self._lock:
+            ticket = self._tickets.get(ticket_id)
+            if ticket is not None:
+                ticket['started_at'] = time.monotonic()
+                self._waits.setdefault(kind, deque(maxlen=500)).append(
+                    ticket['started_at'] - ticket['admitted_at'])
+
+    def _release(self, ticket_id: str):
+        with self._lock:
+            self._tickets.pop(ticket_id, None)
+
+    def wrap(self, kind: str, fn: Callable) -> Callable:
+        """Handler taking the admission ticket first; records the wait and releases the slot"""
+        # Gradio only streams from generator functions, so generators get a generator wrapper
+        if inspect.isgeneratorfunction(fn):
+            def stream_handler(ticket_id, *args):
+                self._start(kind, ticket_id)
+                try:
+                    yield from fn(*args)
+                finally:
+                    self._release(ticket_id)
+            return stream_handler
+
+        def handler(ticket_id, *args):
+            self._start(kind, ticket_id)
+            try:
+                return fn(*args)
+            finally:
+                self._release(ticket_id)
+        return handler
+
+    def metrics(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            result = {}
+            for kind in set(self._counters) | {t['kind'] for t in self._tickets.values()}:
+                waits = sorted(self._waits.get(kind, []))
+                tickets = [t for t in self._tickets.values() if t['kind'] == kind]
+                result[kind] = {
+                    **self._counters.get(kind, {}),
+                    'queued': sum(1 for t in tickets if t['started_at'] is None),
+                    'running': sum(1 for t in tickets if t['started_at'] is not None),
+                    'wait_p50': waits[len(waits) // 2] if waits else None,
+                    'wait_p95': waits[min(int(0.95 * len(waits)), len(waits) - 1)] if waits else None,
+                }
+        return result
+
+    def metrics_markdown(self) -> str:
+        def seconds(value):
+            return f'{value:.1f}s' if value is not None else '-'
+
+        lines = ["| Job | Queued | Running | Admitted | Busy | Per-user limit | Wait p50 | Wait p95 |",
+                 "|---|---|---|---|---|---|---|---|"]
+        for kind, m in sorted(self.metrics().items()):
+            lines.append(
+                f"| {kind} | {m['queued']} | {m['running']} | {m.get('admitted', 0)} | "
+                f"{m.get('rejected_busy', 0)} | {m.get('rejected_user', 0)} | "
+                f"{seconds(m['wait_p50'])} | {seconds(m['wait_p95'])} |"
+            )
+        return '\n'.join(lines)
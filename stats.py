@@ -0,0 +1,273 @@
+import os
+import json
+import base64
+import tarfile
+import tempfile
+import threading
+import requests
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from sampler import BINARY_EXTENSIONS, flatten_structure
+
+STATS_CACHE_DIR = os.path.join('.cache', 'stats')
+
+LANGUAGES = {
+    '.py': 'Python', '.ipynb': 'Jupyter Notebook', '.js': 'JavaScript', '.jsx': 'JavaScript',
+    '.ts': 'TypeScript', '.tsx': 'TypeScript', '.go': 'Go', '.rs': 'Rust', '.java': 'Java',
+    '.kt': 'Kotlin', '.rb': 'Ruby', '.php': 'PHP', '.c': 'C', '.h': 'C', '.cpp': 'C++',
+    '.hpp': 'C++', '.cs': 'C#', '.swift': 'Swift', '.sh': 'Shell', '.html': 'HTML',
+    '.css': 'CSS', '.scss': 'CSS', '.sql': 'SQL', '.r': 'R', '.m': 'MATLAB',
+    '.yaml': 'YAML', '.yml': 'YAML', '.toml': 'TOML', '.md': 'Markdown',
+}
+DATA_EXTENSIONS = ('.csv', '.tsv', '.parquet', '.npy', '.npz', '.h5', '.hdf5', '.jpg', '.jpeg',
+                   '.png', '.bmp', '.wav', '.txt', '.json', '.jsonl', '.cache')
+DATASET_DIR_NAMES = ('data', 'dataset', 'datasets', 'images', 'labels', 'train', 'val', 'test')
+
+# A directory with at least this many data files is treated as a dataset
+DATASET_MIN_FILES = 50
+# Line counting needs the archive, so it is skipped for repositories bigger than this
+MAX_ARCHIVE_KB = 50 * 1024
+MAX_SOURCE_BYTES = 1024 * 1024
+BATCH_BYTES = 4 * 1024 * 1024
+# Source files not counted in an earlier commit are fetched one by one up to this many,
+# beyond that the commit tarball is downloaded instead
+MAX_BLOB_FETCHES = 8
+
+def _extension(path: str) -> str:
+    return os.path.splitext(path)[1].lower() or os.path.basename(path)
+
+def _count_lines(batch: List) -> Dict[str, int]:
+    """Count lines for a batch of (blob sha, content) pairs"""
+    return {
+        sha: content.count(b'\n') + (1 if content and not content.endswith(b'\n') else 0)
+        for sha, content in batch
+    }
+
+def _write_json(path: str, data):
+    # A unique temp file, since concurrent jobs may write the same cache entry
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+class RepoStatsIndex:
+    """Cheap, locally computed facts about a repository, cached per commit"""
+
+    def __init__(self, headers: Dict = None, cache_dir: str = STATS_CACHE_DIR,
+                 count_lines: bool = True, max_workers: int = None):
+        self.headers = headers or {}
+        self.cache_dir = cache_dir
+        self.count_lines = count_lines
+        self.max_workers = max_workers
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        """One long-lived pool; spawned rather than forked, as the server is threaded and loads gRPC"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    def _cache_path(self, username: str, repo_name: str, sha: str) -> str:
+        return os.path.join(self.cache_dir, f'{username}_{repo_name}_{sha}.json')
+
+    def _line_counts_path(self, username: str, repo_name: str) -> str:
+        return os.path.join(self.cache_dir, f'{username}_{repo_name}_lines.json')
+
+    def build(self, username: str, repo_name: str, structure: Dict, sha: Optional[str] = None,
+              tree: Dict[str, Dict] = None, repo_data: Dict = None) -> Dict:
+        """Build (or load) the statistics index for a commit.
+
+        `tree` maps paths to {'sha', 'size'} as returned by KeyFileSampler.fetch_tree; without
+        it the scraped structure is used and file sizes and line counts are unknown. Only
+        complete indexes are cached, so a failed tree or download is retried on the next build.
+        """
+        cache_path = self._cache_path(username, repo_name, sha) if sha else None
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        stats = self.index_tree(tree or {path: {'size': 0} for path in flatten_structure(structure)})
+        complete = bool(tree)
+
+        if self.count_lines and sha and tree:
+            repo_kb = (repo_data or {}).get('size', 0)
+            lines_of_code = self.lines_of_code(username, repo_name, sha, tree, repo_kb)
+            complete = lines_of_code is not None
+            stats['lines_of_code'] = lines_of_code or {}
+
+        if cache_path and complete:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            _write_json(cache_path, stats)
+        return stats
+
+    @staticmethod
+    def index_tree(tree: Dict[str, Dict]) -> Dict:
+        """Single pass over the file list: extension histogram, largest files, datasets, binaries"""
+        extensions = Counter()
+        data_files = Counter()
+        dir_files = Counter()
+        binary_count = 0
+        total_bytes = 0
+
+        for path, blob in tree.items():
+            ext = _extension(path)
+            extensions[ext] += 1
+            total_bytes += blob.get('size', 0)
+            if ext in BINARY_EXTENSIONS:
+                binary_count += 1
+
+            directory = os.path.dirname(path)
+            while directory:
+                dir_files[directory] += 1
+                if ext in DATA_EXTENSIONS:
+                    data_files[directory] += 1
+                directory = os.path.dirname(directory)
+
+        datasets = []
+        for directory in sorted(data_files):
+            # Only report the outermost dataset directory
+            if any(directory.startswith(f'{parent}/') for parent in datasets):
+                continue
+            name = os.path.basename(directory).lower()
+            mostly_data = data_files[directory] >= 0.8 * dir_files[directory]
+            if mostly_data and (data_files[directory] >= DATASET_MIN_FILES
+                                or (name in DATASET_DIR_NAMES and data_files[directory] >= 5)):
+                datasets.append(directory)
+
+        largest = sorted(tree.items(), key=lambda item: item[1].get('size', 0), reverse=True)[:5]
+        return {
+            'file_count': len(tree),
+            'total_bytes': total_bytes,
+            'extensions': dict(extensions.most_common(10)),
+            'largest_files': [
+                {'path': path, 'size': blob['size']} for path, blob in largest if blob.get('size')
+            ],
+            'datasets': [{'path': d, 'files': data_files[d]} for d in datasets],
+            'binary_files': binary_count,
+        }
+
+    def lines_of_code(self, username: str, repo_name: str, sha: str, tree: Dict[str, Dict],
+                      repo_kb: int = 0) -> Optional[Dict[str, int]]:
+        """Lines per language, downloading only source blobs not counted for an earlier commit.
+
+        Line counts are kept per blob SHA, so a push that touches a few files costs a few
+        blob calls rather than the whole tarball. Returns None if a download failed and an
+        empty dict if too much changed in a repository too big to download.
+        """
+        sources = {path: blob for path, blob in tree.items()
+                   if LANGUAGES.get(_extension(path)) and blob.get('size', 0) <= MAX_SOURCE_BYTES}
+        line_counts_path = self._line_counts_path(username, repo_name)
+        known = {}
+        if os.path.exists(line_counts_path):
+            try:
+                with open(line_counts_path, 'r', encoding='utf-8') as f:
+                    known = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable line counts {line_counts_path}: {e}")
+
+        missing = {path: blob['sha'] for path, blob in sources.items() if blob['sha'] not in known}
+        if len(set(missing.values())) <= MAX_BLOB_FETCHES:
+            counted = self.count_blob_lines(username, repo_name, set(missing.values()))
+        elif repo_kb <= MAX_ARCHIVE_KB:
+            counted = self.count_archive_lines(username, repo_name, sha, missing)
+        else:
+            return {}
+        if counted is None:
+            return None
+        known.update(counted)
+
+        counts = Counter()
+        for path, blob in sources.items():
+            counts[LANGUAGES[_extension(path)]] += known.get(blob['sha'], 0)
+        # Keep only this commit's blobs so the file doesn't grow with the history
+        os.makedirs(self.cache_dir, exist_ok=True)
+        _write_json(line_counts_path, {blob['sha']: known[blob['sha']]
+                                       for blob in sources.values() if blob['sha'] in known})
+        return dict(counts.most_common())
+
+    def _fetch_blob(self, username: str, repo_name: str, sha: str) -> Optional[bytes]:
+        url = f"https://api.github.com/repos/{username}/{repo_name}/git/blobs/{sha}"
+        try:
+            response = requests.get(url, headers=self.headers)
+            if response.status_code != 200:
+                print(f"Error accessing {url}: {response.status_code}")
+                return None
+            return base64.b64decode(response.json().get('content', ''))
+        except Exception as e:
+            print(f"Error accessing {url}: {e}")
+            return None
+
+    def count_blob_lines(self, username: str, repo_name: str, shas) -> Optional[Dict[str, int]]:
+        """Fetch a few blobs and count their lines; None if any fetch failed"""
+        shas = sorted(shas)
+        if not shas:
+            return {}
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            contents = list(executor.map(lambda sha: self._fetch_blob(username, repo_name, sha), shas))
+        if any(content is None for content in contents):
+            return None
+        return _count_lines(list(zip(shas, contents)))
+
+    def count_archive_lines(self, username: str, repo_name: str, sha: str,
+                            wanted: Dict[str, str]) -> Optional[Dict[str, int]]:
+        """Stream the commit tarball once and count lines of the `wanted` {path: blob sha}; None if it failed"""
+        url = f"https://api.github.com/repos/{username}/{repo_name}/tarball/{sha}"
+        # Symlinks and the like have no lines but shouldn't be asked for again
+        counts = {blob_sha: 0 for blob_sha in wanted.values()}
+        try:
+            response = requests.get(url, headers=self.headers, stream=True)
+            if response.status_code != 200:
+                print(f"Error accessing {url}: {response.status_code}")
+                return None
+
+            executor = self._executor()
+            futures = []
+            batch, batch_bytes = [], 0
+            with tarfile.open(fileobj=response.raw, mode='r|gz') as archive:
+                for member in archive:
+                    # Members are named '{owner}-{repo}-{short sha}/{path}'
+                    blob_sha = wanted.get(member.name.partition('/')[2])
+                    if not member.isfile() or not blob_sha:
+                        continue
+                    batch.append((blob_sha, archive.extractfile(member).read()))
+                    batch_bytes += member.size
+                    if batch_bytes >= BATCH_BYTES:
+                        futures.append(executor.submit(_count_lines, batch))
+                        batch, batch_bytes = [], 0
+            if batch:
+                futures.append(executor.submit(_count_lines, batch))
+
+            for future in futures:
+                counts.update(future.result())
+        except Exception as e:
+            print(f"Error counting lines for {username}/{repo_name}: {e}")
+            return None
+
+        return counts
+
+    @staticmethod
+    def format_stats(stats: Dict) -> str:
+        """Render the index as a few compact prompt lines"""
+        def size(n):
+            return f'{n / 1024 / 1024:.1f} MB' if n >= 1024 * 1024 else f'{n / 1024:.0f} KB'
+
+        lines = [f"- Files: {stats['file_count']}"
+                 + (f" ({size(stats['total_bytes'])})" if stats['total_bytes'] else '')]
+        if stats.get('lines_of_code'):
+            lines.append('- Lines of code: ' + ', '.join(
+                f'{language} {count}' for language, count in stats['lines_of_code'].items()))
+        lines.append('- File types: ' + ', '.join(
+            f'{ext} {count}' for ext, count in stats['extensions'].items()))
+        if stats['largest_files']:
+            lines.append('- Largest files: ' + ', '.join(
+                f"{item['path']} ({size(item['size'])})" for item in stats['largest_files']))
+        if stats['datasets']:
+            lines.append('- Datasets: ' + ', '.join(
+                f"{item['path']} ({item['files']} files)" for item in stats['datasets']))
+        lines.append(f"- Binary files: {stats['binary_files']}")
+        return '\n'.join(lines)
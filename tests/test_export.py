@@ -0,0 +1,46 @@
+import io
+import zipfile
+from export import bundle_entries, repo_assets_dir, report_pdf_name, stream_zip
+from incremental import DocumentStore
+
+def test_stream_zip_round_trip(tmp_path):
+    pdf = tmp_path / 'report.pdf'
+    pdf.write_bytes(b'%PDF' + bytes(range(256)) * 1000)
+    chunks = list(stream_zip([
+        ('README.md', b'# Demo\n' * 1000),
+        ('project_report.pdf', str(pdf)),
+    ]))
+
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+    assert archive.testzip() is None
+    assert archive.read('README.md') == b'# Demo\n' * 1000
+    assert archive.read('project_report.pdf') == pdf.read_bytes()
+    # Already compressed formats are stored, text is deflated
+    assert archive.getinfo('project_report.pdf').compress_type == zipfile.ZIP_STORED
+    assert archive.getinfo('README.md').compress_type == zipfile.ZIP_DEFLATED
+
+def test_stream_zip_yields_in_pieces(tmp_path):
+    big = tmp_path / 'audio.mp3'
+    big.write_bytes(b'\0' * (1024 * 1024))
+    chunks = list(stream_zip([('assets/audio.mp3', str(big))]))
+    assert len(chunks) > 10
+    assert max(len(chunk) for chunk in chunks) < 128 * 1024
+
+def test_bundle_only_includes_the_repositorys_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = DocumentStore(str(tmp_path / 'documents'))
+    store.save('alice', 'foo', 'readme', 'a' * 40, {}, '# Foo')
+    for owner in ('alice', 'bob'):
+        assets = tmp_path / repo_assets_dir(owner, 'foo')
+        assets.mkdir(parents=True)
+        (assets / 'description.txt').write_text(owner)
+    (tmp_path / 'outputs').mkdir()
+    (tmp_path / 'outputs' / report_pdf_name('alice', 'foo')).write_bytes(b'%PDF')
+
+    entries = dict(bundle_entries('alice', 'foo', store))
+    assert entries['README.md'] == b'# Foo'
+    assert entries['project_report.pdf'].endswith(report_pdf_name('alice', 'foo'))
+    with open(entries['assets/description.txt']) as f:
+        assert f.read() == 'alice'
+
+    assert [name for name, _ in bundle_entries('bob', 'foo', store)] == ['assets/description.txt']
@@ -0,0 +1,115 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+import github_api
+from github_api import fetch_paginated, tree_blobs, tree_to_structure
+
+ITEMS = list(range(250))
+
+class ListingServer:
+    """Serves ITEMS in pages, with a Link header of the chosen style and optional failures"""
+
+    def __init__(self, with_last=True, failures=None):
+        self.with_last = with_last
+        self.failures = dict(failures or {})  # page -> number of 500s to answer first
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                page = int(query.get('page', ['1'])[0])
+                per_page = int(query.get('per_page', ['30'])[0])
+                server.requests.append(page)
+                if server.failures.get(page):
+                    server.failures[page] -= 1
+                    self.send_response(500)
+                    self.end_headers()
+                    return
+
+                last = -(-len(ITEMS) // per_page)
+                body = json.dumps(ITEMS[(page - 1) * per_page:page * per_page]).encode('utf-8')
+                base = f'{server.url}?per_page={per_page}'
+                links = []
+                if page < last:
+                    links.append(f'<{base}&page={page + 1}>; rel="next"')
+                    if server.with_last:
+                        links.append(f'<{base}&page={last}>; rel="last"')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                if links:
+                    self.send_header('Link', ', '.join(links))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address[:2]
+        self.url = f'http://{host}:{port}/items'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def listing(monkeypatch):
+    monkeypatch.setattr(github_api.time, 'sleep', lambda seconds: None)
+    servers = []
+
+    def make(**kwargs):
+        servers.append(ListingServer(**kwargs))
+        return servers[-1]
+
+    yield make
+    for server in servers:
+        server.close()
+
+def test_fetches_every_page_from_rel_last(listing):
+    server = listing()
+    assert sorted(fetch_paginated(server.url)) == ITEMS
+    assert sorted(server.requests) == [1, 2, 3]
+
+def test_follows_rel_next_in_order(listing):
+    server = listing(with_last=False)
+    assert fetch_paginated(server.url) == ITEMS
+    assert server.requests == [1, 2, 3]
+
+def test_max_items_stops_early(listing):
+    server = listing()
+    assert fetch_paginated(server.url, max_items=5) == ITEMS[:5]
+    assert server.requests == [1]
+
+def test_failed_page_is_retried(listing):
+    server = listing(failures={2: 1})
+    assert sorted(fetch_paginated(server.url)) == ITEMS
+    assert server.requests.count(2) == 2
+
+def test_page_that_keeps_failing_leaves_a_partial_listing(listing, capsys):
+    server = listing(failures={3: github_api.PAGE_ATTEMPTS})
+    assert sorted(fetch_paginated(server.url)) == ITEMS[:200]
+    assert 'incomplete' in capsys.readouterr().out
+
+def test_tree_to_structure():
+    structure = tree_to_structure([
+        {'path': 'README.md', 'type': 'blob'},
+        {'path': 'src', 'type': 'tree'},
+        {'path': 'src/app.py', 'type': 'blob'},
+        {'path': 'src/utils/io.py', 'type': 'blob'},
+    ])
+    assert structure == {
+        'files': ['README.md'],
+        'directories': {'src': {'files': ['app.py'], 'directories': {
+            'utils': {'files': ['io.py'], 'directories': {}}}}},
+    }
+
+def test_tree_blobs_skips_directories():
+    assert tree_blobs([
+        {'path': 'src', 'type': 'tree', 'sha': 't1'},
+        {'path': 'src/app.py', 'type': 'blob', 'sha': 'b1', 'size': 120},
+        {'path': 'vendor/lib', 'type': 'commit', 'sha': 'c1'},
+    ]) == {'src/app.py': {'sha': 'b1', 'size': 120}}
@@ -0,0 +1,82 @@
+import threading
+from incremental import (README_SECTIONS, DocumentStore, affected_sections, clean_section,
+                         join_sections, section_key, splice_sections, split_sections)
+
+README = """# Demo
+
+Intro text.
+
+## Installation
+pip install demo
+
+## Usage
+```bash
+## not a header inside a fence
+python main.py
+```
+
+## License
+MIT
+"""
+
+def test_split_sections_skips_headers_in_code_fences():
+    headers = [header for header, _ in split_sections(README)]
+    assert headers == ['', '## Installation', '## Usage', '## License']
+
+def test_split_and_join_round_trip():
+    assert join_sections(split_sections(README)) == README
+
+def test_section_key_matches_keywords():
+    assert section_key('## Installation', README_SECTIONS) == 'dependencies'
+    assert section_key('## 3. Usage', README_SECTIONS) == 'usage'
+    assert section_key('## Setup', README_SECTIONS) is None
+
+def test_splice_replaces_sections_and_inserts_missing_before_license():
+    text = splice_sections(README, {
+        '## Installation': '## Installation\npip install demo[all]\n',
+        '## Contributors': '## Contributors\n- alice\n',
+    })
+    headers = [header for header, _ in split_sections(text)]
+    assert headers == ['', '## Installation', '## Usage', '## Contributors', '## License']
+    assert 'pip install demo[all]' in text
+    assert 'pip install demo\n' not in text
+    assert '## not a header inside a fence' in text
+
+def test_affected_sections():
+    diff = {'total_commits': 2, 'files': [
+        {'filename': 'requirements.txt', 'status': 'modified'},
+        {'filename': 'src/new_module.py', 'status': 'added'},
+        {'filename': 'config/app.yaml', 'status': 'modified'},
+    ]}
+    assert affected_sections(diff) == {'contributors', 'dependencies', 'structure', 'usage'}
+    assert affected_sections({'total_commits': 0, 'files': []}) == set()
+
+def test_concurrent_saves_of_one_document(tmp_path):
+    store = DocumentStore(str(tmp_path))
+    errors = []
+
+    def save(n):
+        try:
+            for _ in range(20):
+                store.save('octo', 'demo', 'readme', f'sha{n}', {}, f'text {n}')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert store.load('octo', 'demo', 'readme')['text'].startswith('text ')
+    assert [p.name for p in tmp_path.iterdir()] == ['octo_demo_readme.json']
+
+def test_clean_section_strips_a_wrapping_fence():
+    reply = '```markdown\n## Usage\n```bash\npython main.py --fast\n```\n```'
+    assert clean_section(reply, '## Usage') == '## Usage\n```bash\npython main.py --fast\n```\n'
+    assert clean_section('## Usage\nRun it.\n', '## Usage') == '## Usage\nRun it.\n'
+
+def test_clean_section_rejects_replies_that_are_not_the_section():
+    assert clean_section('Here is the updated section:\n## Usage\nRun it.', '## Usage') is None
+    assert clean_section('## How to use\nRun it.', '## Usage') is None
+    assert clean_section('## Usage\nRun it.\n## Extra\nMore.', '## Usage') is None
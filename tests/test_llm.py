@@ -0,0 +1,114 @@
+import time
+import threading
+import pytest
+from google.api_core import exceptions as google_exceptions
+from llm import LLMClient
+
+class FakeResponse:
+    usage_metadata = None
+
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    """Stands in for a GenerativeModel; each call plays the next step of `script`.
+
+    A step is an exception to raise, a text to return, (seconds, text) to
+    answer after a delay, or for streams a list of chunks, where an exception
+    in the list is raised mid-stream. The last step repeats once the script
+    runs out.
+    """
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, request_options=None, stream=False):
+        with self._lock:
+            self.calls += 1
+            step = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(step, Exception):
+            raise step
+        if stream:
+            return self._chunks(step)
+        delay, text = step if isinstance(step, tuple) else (0, step)
+        time.sleep(delay)
+        return FakeResponse(text)
+
+    @staticmethod
+    def _chunks(step):
+        for chunk in step:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield FakeResponse(chunk)
+
+def client(model, fallback=None, **kwargs):
+    llm = LLMClient(backoff_base=0.01, **kwargs)
+    llm.model = model
+    llm.fallback_model = fallback
+    return llm
+
+def test_transient_errors_are_retried():
+    model = FakeModel(google_exceptions.ServiceUnavailable('overloaded'), 'hello')
+    llm = client(model)
+    assert llm.generate('prompt') == 'hello'
+    assert model.calls == 2
+    assert llm.metrics()['retries'] == 1
+
+def test_other_errors_are_not_retried():
+    model = FakeModel(ValueError('blocked'))
+    llm = client(model)
+    with pytest.raises(ValueError):
+        llm.generate('prompt')
+    assert model.calls == 1
+    assert llm.metrics()['errors'] == 1
+
+def test_gives_up_at_the_deadline():
+    llm = client(FakeModel((1.0, 'late')), deadline=0.2)
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        llm.generate('prompt')
+    assert time.monotonic() - started < 0.5
+    assert llm.metrics()['timeouts'] == 1
+
+def test_slow_call_is_hedged_to_the_fallback():
+    primary = FakeModel('fast', 'fast', 'fast', (1.0, 'slow'))
+    fallback = FakeModel('from fallback')
+    llm = client(primary, fallback, hedge_min_samples=3)
+    for _ in range(3):
+        llm.generate('prompt', task='readme')
+
+    assert llm.generate('prompt', task='readme') == 'from fallback'
+    metrics = llm.metrics()
+    assert (metrics['hedged'], metrics['hedge_wins']) == (1, 1)
+
+def test_hedge_threshold_is_kept_per_task():
+    primary = FakeModel('fast', 'fast', 'fast', (0.2, 'report'))
+    fallback = FakeModel('from fallback')
+    llm = client(primary, fallback, hedge_min_samples=3)
+    for _ in range(3):
+        llm.generate('prompt', task='section')
+
+    # Short section rewrites say nothing about how long a report takes
+    assert llm.hedge_delay('report') is None
+    assert llm.generate('prompt', task='report') == 'report'
+    assert llm.metrics()['hedged'] == 0
+    assert fallback.calls == 0
+
+def test_stream_retries_errors_before_the_first_chunk():
+    model = FakeModel(google_exceptions.ServiceUnavailable('overloaded'), ['# Demo', '\nIntro'])
+    llm = client(model)
+    assert ''.join(llm.stream('prompt', task='readme')) == '# Demo\nIntro'
+    assert model.calls == 2
+    assert llm.metrics()['retries'] == 1
+
+def test_stream_is_not_retried_once_output_was_shown():
+    model = FakeModel(['# Demo', google_exceptions.ServiceUnavailable('dropped')], ['# Again'])
+    llm = client(model)
+    chunks = []
+    with pytest.raises(google_exceptions.ServiceUnavailable):
+        for chunk in llm.stream('prompt'):
+            chunks.append(chunk)
+    assert chunks == ['# Demo']
+    assert model.calls == 1
@@ -0,0 +1,115 @@
+import pytest
+import metadata as metadata_module
+from github_stub import StubGitHubServer
+from metadata import GitHubMetadataFetcher, build_query
+
+CONTRIBUTORS = [
+    {'login': 'alice', 'html_url': 'https://github.com/alice', 'contributions': 40, 'id': 1},
+    {'login': 'bob', 'html_url': 'https://github.com/bob', 'contributions': 3, 'id': 2},
+]
+
+def make_repo(full_name):
+    return {
+        'full_name': full_name, 'description': 'demo', 'stargazers_count': 7, 'forks_count': 2,
+        'created_at': '2024-01-01T00:00:00Z', 'pushed_at': '2024-06-01T00:00:00Z', 'size': 120,
+        'language': 'Python', 'languages': {'Python': 900, 'Shell': 100},
+        'default_branch': 'main', 'head_sha': 'a' * 40, 'contributors': CONTRIBUTORS,
+    }
+
+@pytest.fixture
+def stub():
+    repos = {name: make_repo(name) for name in ('octo/one', 'octo/two', 'octo/three')}
+    with StubGitHubServer(repos) as server:
+        yield server
+
+def fetcher(stub, token='token', **kwargs):
+    return GitHubMetadataFetcher(token, api_url=stub.api_url, graphql_url=stub.graphql_url, **kwargs)
+
+def test_build_query_aliases_each_repo():
+    query, variables = build_query([('octo', 'one'), ('octo', 'two')])
+    assert 'r0: repository(owner: $o0, name: $n0)' in query
+    assert 'r1: repository(owner: $o1, name: $n1)' in query
+    assert variables == {'o0': 'octo', 'n0': 'one', 'o1': 'octo', 'n1': 'two'}
+
+def test_graphql_query_plus_rest_contributors(stub):
+    data = fetcher(stub).fetch('octo', 'one')
+
+    posts = [r for r in stub.requests if r[0] == 'POST']
+    gets = [path for method, path in stub.requests if method == 'GET']
+    assert posts == [('POST', '/graphql')]
+    # Only the contributors ranking comes from REST
+    assert [path.split('?')[0] for path in gets] == ['/repos/octo/one/contributors']
+
+    assert data['stargazers_count'] == 7
+    assert data['languages'] == {'Python': 900, 'Shell': 100}
+    assert data['head_sha'] == 'a' * 40
+    assert data['default_branch'] == 'main'
+    assert data['contributors'] == [
+        {'login': 'alice', 'html_url': 'https://github.com/alice', 'contributions': 40},
+        {'login': 'bob', 'html_url': 'https://github.com/bob', 'contributions': 3},
+    ]
+
+def test_batches_repos_per_query(stub):
+    repos = [('octo', 'one'), ('octo', 'two'), ('octo', 'three')]
+    results = fetcher(stub, batch_size=2).fetch_many(repos)
+
+    assert sorted(results) == sorted(repos)
+    assert sum(1 for method, _ in stub.requests if method == 'POST') == 2
+    assert all(data['full_name'] == f'{owner}/{name}' for (owner, name), data in results.items())
+
+def test_rest_fallback_without_token(stub):
+    data = fetcher(stub, token=None).fetch('octo', 'two')
+
+    assert not any(method == 'POST' for method, _ in stub.requests)
+    paths = sorted(path.split('?')[0] for _, path in stub.requests)
+    assert paths == ['/repos/octo/two', '/repos/octo/two/commits/HEAD',
+                     '/repos/octo/two/contributors', '/repos/octo/two/languages']
+    assert data['head_sha'] == 'a' * 40
+    assert data['languages'] == {'Python': 900, 'Shell': 100}
+    assert data['contributors'][0] == {'login': 'alice', 'html_url': 'https://github.com/alice',
+                                       'contributions': 40}
+
+def test_repo_missing_from_graphql_falls_back_to_rest(stub):
+    results = fetcher(stub).fetch_many([('octo', 'one'), ('octo', 'missing')])
+
+    assert results[('octo', 'one')]['stargazers_count'] == 7
+    assert results[('octo', 'missing')] == {}
+    assert ('GET', '/repos/octo/missing') in stub.requests
+
+def test_empty_batch():
+    assert GitHubMetadataFetcher('token').fetch_many([]) == {}
+
+def test_rest_fallback_reuses_the_contributors_request(stub):
+    results = fetcher(stub).fetch_many([('octo', 'one'), ('octo', 'missing')])
+
+    contributor_calls = [path for _, path in stub.requests if '/contributors' in path]
+    assert len(contributor_calls) == 2
+    assert results[('octo', 'one')]['contributors'][0]['login'] == 'alice'
+
+def test_unchanged_ranking_is_revalidated_by_etag(stub, monkeypatch):
+    statuses = []
+    get = metadata_module.requests.get
+
+    def recording_get(url, **kwargs):
+        response = get(url, **kwargs)
+        statuses.append(response.status_code)
+        return response
+
+    monkeypatch.setattr(metadata_module.requests, 'get', recording_get)
+    metadata = fetcher(stub)
+    first = metadata.fetch('octo', 'one')
+    second = metadata.fetch('octo', 'one')
+    assert statuses == [200, 304]
+    assert second['contributors'] == first['contributors']
+
+    stub.repos['octo/one']['contributors'] = CONTRIBUTORS[::-1]
+    assert metadata.fetch('octo', 'one')['contributors'][0]['login'] == 'bob'
+
+def test_prefetched_metadata_is_served_without_requests(stub):
+    metadata = fetcher(stub)
+    metadata.prefetch([('octo', 'one'), ('octo', 'two'), ('octo', 'three')])
+    sent = len(stub.requests)
+    assert sum(1 for method, _ in stub.requests if method == 'POST') == 1
+
+    assert metadata.fetch('octo', 'two')['full_name'] == 'octo/two'
+    assert len(stub.requests) == sent
@@ -0,0 +1,42 @@
+import time
+import org_scan
+from org_scan import GITHUB_CALLS_PER_TASK, GitHubBudget
+
+class FakeRateLimit:
+    """Stands in for requests.get on /rate_limit with a settable core figure"""
+
+    def __init__(self, limit, remaining):
+        self.limit = limit
+        self.remaining = remaining
+
+    def __call__(self, url, headers=None):
+        return self
+
+    def json(self):
+        return {'resources': {'core': {'limit': self.limit, 'remaining': self.remaining,
+                                       'reset': time.time() + 3600}}}
+
+def no_sleep(seconds):
+    raise AssertionError(f'budget waited {seconds:.0f}s')
+
+def test_unauthenticated_limit_does_not_wait_forever(monkeypatch):
+    monkeypatch.setattr(org_scan.requests, 'get', FakeRateLimit(limit=60, remaining=60))
+    monkeypatch.setattr(org_scan.time, 'sleep', no_sleep)
+    budget = GitHubBudget()
+
+    # The reserve shrinks to a quarter of the limit and a large job is capped to what's left of it
+    assert budget.acquire(GITHUB_CALLS_PER_TASK + 500) == 60 - 15
+
+def test_release_keeps_running_jobs_reservations(monkeypatch):
+    rate_limit = FakeRateLimit(limit=5000, remaining=1000)
+    monkeypatch.setattr(org_scan.requests, 'get', rate_limit)
+    budget = GitHubBudget()
+
+    first = budget.acquire(300)
+    second = budget.acquire(300)
+    # The first job finishes having spent 100 calls; the second hasn't started spending
+    rate_limit.remaining = 900
+    budget.release(first)
+
+    assert budget.outstanding == second
+    assert budget.remaining == 900 - second
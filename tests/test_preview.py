@@ -0,0 +1,29 @@
+import pytest
+from preview import MarkdownPreviewRenderer, split_blocks
+
+def test_split_blocks_keeps_fenced_code_whole():
+    text = "Intro\n\n```python\na = 1\n\nb = 2\n```\n\nOutro"
+    assert split_blocks(text) == ['Intro', '```python\na = 1\n\nb = 2\n```', 'Outro']
+
+def test_split_blocks_merges_loose_lists():
+    text = "- one\n\n- two\n\n  more about two\n\nAfter"
+    assert split_blocks(text) == ['- one\n\n- two\n\n  more about two', 'After']
+
+def test_reference_links_resolve_across_blocks():
+    pytest.importorskip('markdown_it')
+    renderer = MarkdownPreviewRenderer()
+    text = "# Demo\n\n[![CI][badge]][ci] and [docs][1]\n\n[badge]: https://img.example/ci.svg\n[ci]: https://ci.example\n[1]: https://docs.example"
+    html = renderer.render(text)
+    assert '<a href="https://docs.example">docs</a>' in html
+    assert '<img src="https://img.example/ci.svg" alt="CI" />' in html
+
+    # Editing a definition re-renders the blocks that use it
+    assert 'https://docs.example/v2' in renderer.render(text.replace('https://docs.example', 'https://docs.example/v2'))
+
+def test_unchanged_blocks_come_from_cache():
+    renderer = MarkdownPreviewRenderer()
+    renderer.render("# Title\n\nFirst paragraph")
+    renderer.render("# Title\n\nFirst paragraph\n\nSecond paragraph")
+    stats = renderer.stats()
+    assert stats['blocks_rendered'] == 3
+    assert stats['blocks_cached'] == 2
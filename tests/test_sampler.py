@@ -0,0 +1,26 @@
+from sampler import KeyFileSampler
+
+def test_select_skips_duplicate_blobs(tmp_path):
+    sampler = KeyFileSampler(cache_dir=str(tmp_path))
+    structure = {'files': ['requirements.txt', 'main.py'],
+                 'directories': {'docs': {'files': ['requirements.txt'], 'directories': {}}}}
+    tree = {
+        'requirements.txt': {'sha': 'a' * 40, 'size': 100},
+        'docs/requirements.txt': {'sha': 'a' * 40, 'size': 100},
+        'main.py': {'sha': 'b' * 40, 'size': 200},
+    }
+    assert [item['path'] for item in sampler.select(structure, tree)] == ['requirements.txt', 'main.py']
+
+def test_select_respects_download_budget(tmp_path):
+    sampler = KeyFileSampler(cache_dir=str(tmp_path), download_budget=1000)
+    structure = {'files': ['requirements.txt', 'main.py', 'setup.py'], 'directories': {}}
+    tree = {
+        'requirements.txt': {'sha': 'a' * 40, 'size': 800},
+        'setup.py': {'sha': 'b' * 40, 'size': 800},
+        'main.py': {'sha': 'c' * 40, 'size': 300},
+    }
+    cached = tmp_path / 'bb' / ('b' * 40)
+    cached.parent.mkdir()
+    cached.write_bytes(b'x' * 800)
+    # setup.py is cached and costs nothing; main.py no longer fits after requirements.txt
+    assert [item['path'] for item in sampler.select(structure, tree)] == ['requirements.txt', 'setup.py']
@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+import gradio as gr
+import pytest
+import server
+from server import AdmissionController, ServerSettings
+
+def session(name, username=None):
+    return SimpleNamespace(session_hash=name, username=username, client=SimpleNamespace(host='10.0.0.1'))
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, 'monotonic', clock)
+    return clock
+
+def test_queue_limit_counts_only_waiting_jobs(clock):
+    admission = AdmissionController(ServerSettings(heavy_concurrency=1, max_queue=2))
+    first = admission.admit('report', session('a'))
+    admission.admit('report', session('b'))
+    with pytest.raises(gr.Error):
+        admission.admit('report', session('c'))
+
+    # Once a job starts it no longer holds a queue place
+    admission._start('report', first)
+    admission.admit('report', session('c'))
+    assert admission.metrics()['report']['rejected_busy'] == 1
+
+def test_users_behind_one_proxy_are_told_apart_by_session(clock):
+    admission = AdmissionController(ServerSettings())
+    admission.admit('readme', session('a'))
+    admission.admit('readme', session('b'))
+    with pytest.raises(gr.Error):
+        admission.admit('readme', session('a'))
+    assert admission.metrics()['readme']['rejected_user'] == 1
+
+def test_handler_records_wait_and_frees_the_slot(clock):
+    admission = AdmissionController(ServerSettings())
+    handler = admission.wrap('readme', lambda repo_link: f'README for {repo_link}')
+
+    ticket = admission.admit('readme', session('a'))
+    clock.now += 3
+    assert handler(ticket, 'octo/demo') == 'README for octo/demo'
+    metrics = admission.metrics()['readme']
+    assert (metrics['queued'], metrics['running'], metrics['wait_p50']) == (0, 0, 3)
+    admission.admit('readme', session('a'))
+
+def test_closed_tab_releases_its_queued_ticket(clock):
+    admission = AdmissionController(ServerSettings())
+    admission.admit('report', session('a'))
+    admission.release_session(session('a'))
+    assert admission.metrics()['report']['queued'] == 0
+    admission.admit('report', session('a'))
+
+def test_long_queue_waits_do_not_expire(clock):
+    admission = AdmissionController(ServerSettings(heavy_concurrency=1, max_queue=32))
+    ticket = admission.admit('report', session('a'))
+
+    # Far past the old five minute TTL, but a full queue ahead could still take longer
+    clock.now += 60 * 60
+    assert admission.metrics()['report']['queued'] == 1
+    with pytest.raises(gr.Error):
+        admission.admit('report', session('a'))
+    admission._start('report', ticket)
+    assert admission.metrics()['report']['wait_p95'] == 60 * 60
+
+def test_abandoned_ticket_expires_after_the_backstop(clock):
+    admission = AdmissionController(ServerSettings(heavy_concurrency=1, max_queue=32))
+    admission.admit('report', session('a'))
+    clock.now += admission.ticket_ttl('report') + 1
+    assert admission.metrics()['report']['queued'] == 0
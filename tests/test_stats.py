@@ -0,0 +1,46 @@
+import base64
+import stats
+from stats import RepoStatsIndex
+
+class FakeBlobs:
+    """Stands in for requests.get on the git/blobs endpoint"""
+
+    def __init__(self, contents):
+        self.contents = contents
+        self.requested = []
+
+    def __call__(self, url, headers=None, **kwargs):
+        assert '/git/blobs/' in url, url
+        sha = url.rsplit('/', 1)[1]
+        self.requested.append(sha)
+        return FakeResponse(self.contents[sha])
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, content):
+        self.content = content
+
+    def json(self):
+        return {'content': base64.b64encode(self.content).decode('ascii')}
+
+def test_later_commits_only_fetch_changed_source_files(tmp_path, monkeypatch):
+    blobs = FakeBlobs({'a1': b'import os\nprint(1)\n', 'b1': b'x = 1', 'a2': b'import os\n', 'r1': b''})
+    monkeypatch.setattr(stats.requests, 'get', blobs)
+    index = RepoStatsIndex(cache_dir=str(tmp_path))
+
+    first = {'main.py': {'sha': 'a1', 'size': 19}, 'util.py': {'sha': 'b1', 'size': 5},
+             'README.md': {'sha': 'r1', 'size': 0}}
+    assert index.lines_of_code('octo', 'demo', 'c1', first) == {'Python': 3, 'Markdown': 0}
+    assert sorted(blobs.requested) == ['a1', 'b1', 'r1']
+
+    blobs.requested.clear()
+    second = dict(first, **{'main.py': {'sha': 'a2', 'size': 10}})
+    assert index.lines_of_code('octo', 'demo', 'c2', second) == {'Python': 2, 'Markdown': 0}
+    assert blobs.requested == ['a2']
+
+def test_too_many_changes_in_a_big_repository_skips_counting(tmp_path, monkeypatch):
+    monkeypatch.setattr(stats.requests, 'get', FakeBlobs({}))
+    index = RepoStatsIndex(cache_dir=str(tmp_path))
+    tree = {f'src/m{n}.py': {'sha': f's{n}', 'size': 10} for n in range(stats.MAX_BLOB_FETCHES + 1)}
+    assert index.lines_of_code('octo', 'demo', 'c1', tree, repo_kb=stats.MAX_ARCHIVE_KB + 1) == {}
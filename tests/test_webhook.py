@@ -0,0 +1,91 @@
+import json
+import time
+import pytest
+from webhook import WebhookReceiver, parse_registered_repos, post_sample_push, sample_push_payload, sign_payload
+
+SECRET = 'shh'
+
+class FakeGenerator:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.warmed = []
+
+    def warm_cache(self, repo_link, regenerate=False):
+        self.warmed.append(repo_link)
+        if self.fail:
+            raise RuntimeError('Error generating README')
+
+def push(receiver, full_name, sha='a' * 40, ref='refs/heads/main', secret=SECRET):
+    payload = sample_push_payload(full_name, sha)
+    payload['ref'] = ref
+    body = json.dumps(payload).encode('utf-8')
+    return receiver.handle('push', body, sign_payload(secret, body))
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+@pytest.fixture
+def make_receiver():
+    receivers = []
+
+    def make(generator=None, **kwargs):
+        settings = dict(secret=SECRET, debounce=0.2, max_debounce=1.0, port=0)
+        settings.update(kwargs)
+        receiver = WebhookReceiver(generator or FakeGenerator(),
+                                   parse_registered_repos('octo/app:1,octo/docs'), **settings)
+        receivers.append(receiver)
+        return receiver
+
+    yield make
+    for receiver in receivers:
+        receiver.stop()
+
+def test_parse_registered_repos():
+    assert parse_registered_repos(' Octo/App:1, octo/docs ,') == {'octo/app': 1, 'octo/docs': 10}
+
+def test_rejects_bad_signatures_and_ignores_other_pushes(make_receiver):
+    receiver = make_receiver()
+    assert push(receiver, 'octo/app', secret='wrong') == (401, 'invalid signature')
+    assert push(receiver, 'octo/app', ref='refs/heads/feature') == (202, 'ignored')
+    assert push(receiver, 'octo/unknown') == (202, 'ignored')
+    assert receiver.handle('ping', b'{}', sign_payload(SECRET, b'{}')) == (200, 'pong')
+    assert receiver.status() == {'received': 2, 'ignored': 2, 'coalesced': 0,
+                                 'refreshed': 0, 'failed': 0, 'queued': 0}
+
+def test_sample_pushes_are_debounced_into_one_refresh(make_receiver):
+    generator = FakeGenerator()
+    receiver = make_receiver(generator).start()
+    for sha in ('1' * 40, '2' * 40, '3' * 40):
+        assert post_sample_push(receiver.url, 'octo/app', sha, SECRET) == 202
+
+    wait_for(lambda: receiver.status()['refreshed'] == 1)
+    assert generator.warmed == ['https://github.com/octo/app']
+    assert receiver.status()['coalesced'] == 2
+
+def test_busy_repository_is_still_refreshed_after_max_debounce(make_receiver):
+    receiver = make_receiver(debounce=0.2, max_debounce=0.3)
+    push(receiver, 'octo/app')
+    first_seen = receiver._pending['octo/app']['first_seen']
+    time.sleep(0.15)
+    push(receiver, 'octo/app')
+    assert receiver._pending['octo/app']['due'] == pytest.approx(first_seen + 0.3)
+
+def test_higher_priority_repository_runs_first(make_receiver):
+    receiver = make_receiver(debounce=0.05)
+    push(receiver, 'octo/docs')
+    push(receiver, 'octo/app')
+    time.sleep(0.1)
+
+    assert receiver._next_due()[0] == 'octo/app'
+    assert receiver._next_due()[0] == 'octo/docs'
+
+def test_failed_refresh_is_counted(make_receiver):
+    generator = FakeGenerator(fail=True)
+    receiver = make_receiver(generator, debounce=0.01).start()
+    push(receiver, 'octo/app')
+
+    wait_for(lambda: receiver.status()['failed'] == 1)
+    assert receiver.status()['refreshed'] == 0
@@ -0,0 +1,245 @@
+import os
+import hmac
+import json
+import time
+import heapq
+import hashlib
+import argparse
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+# Pushes to the same repository within this window are coalesced into one refresh
+DEBOUNCE_SECONDS = 30
+# A repository that keeps receiving pushes is still refreshed at least this often
+MAX_DEBOUNCE_SECONDS = 300
+DEFAULT_PRIORITY = 10
+
+def parse_registered_repos(value: str) -> Dict[str, int]:
+    """Parse 'owner/name[:priority],...' into {full_name: priority}, lower runs first"""
+    repos = {}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        full_name, _, priority = entry.partition(':')
+        repos[full_name.lower()] = int(priority) if priority else DEFAULT_PRIORITY
+    return repos
+
+def sign_payload(secret: str, body: bytes) -> str:
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+def sample_push_payload(full_name: str, sha: str, branch: str = 'main') -> Dict:
+    """Minimal push event body, enough for the receiver to act on"""
+    return {
+        'ref': f'refs/heads/{branch}',
+        'after': sha,
+        'repository': {
+            'full_name': full_name,
+            'html_url': f'https://github.com/{full_name}',
+            'default_branch': branch,
+        },
+    }
+
+def post_sample_push(url: str, full_name: str, sha: str, secret: Optional[str] = None,
+                     branch: str = 'main') -> int:
+    """Send a sample push event to a running receiver and return the HTTP status"""
+    body = json.dumps(sample_push_payload(full_name, sha, branch)).encode('utf-8')
+    headers = {'Content-Type': 'application/json', 'X-GitHub-Event': 'push'}
+    if secret:
+        headers['X-Hub-Signature-256'] = sign_payload(secret, body)
+    return requests.post(url, data=body, headers=headers).status_code
+
+class WebhookReceiver:
+    """Accepts GitHub push events and refreshes caches ahead of demand.
+
+    Pushes for registered repositories are debounced per repository and queued
+    by priority; a single worker thread calls `generator.warm_cache` for each,
+    which refreshes the metadata, structure snapshot, key file blobs and
+    statistics, and regenerates the stored README and report when
+    `regenerate` is set.
+    """
+
+    def __init__(self, generator, repos: Dict[str, int], secret: Optional[str] = None,
+                 regenerate: bool = False, debounce: float = DEBOUNCE_SECONDS,
+                 max_debounce: float = MAX_DEBOUNCE_SECONDS,
+                 host: str = '127.0.0.1', port: int = 8765):
+        self.generator = generator
+        self.repos = repos
+        self.secret = secret
+        self.regenerate = regenerate
+        self.debounce = debounce
+        self.max_debounce = max_debounce
+
+        self._lock = threading.Condition()
+        self._queue = []
+        self._pending = {}  # full_name -> {'due', 'first_seen', 'sha', 'html_url'}
+        self._seq = 0
+        self._stopped = False
+        self.counters = {'received': 0, 'ignored': 0, 'coalesced': 0, 'refreshed': 0, 'failed': 0}
+
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+                status, message = receiver.handle(
+                    self.headers.get('X-GitHub-Event', ''), body,
+                    self.headers.get('X-Hub-Signature-256'),
+                )
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/plain')
+                self.end_headers()
+                self.wfile.write(message.encode('utf-8'))
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self._threads = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/webhook'
+
+    def handle(self, event: str, body: bytes, signature: Optional[str]):
+        """Validate and enqueue one delivery; returns (status, message)"""
+        if self.secret and not hmac.compare_digest(sign_payload(self.secret, body), signature or ''):
+            return 401, 'invalid signature'
+        if event == 'ping':
+            return 200, 'pong'
+        if event != 'push':
+            return 202, f'ignored {event or "unknown"} event'
+
+        try:
+            payload = json.loads(body)
+            repository = payload['repository']
+            full_name = repository['full_name'].lower()
+        except (ValueError, KeyError, TypeError):
+            return 400, 'malformed push payload'
+
+        with self._lock:
+            self.counters['received'] += 1
+            default_ref = f"refs/heads/{repository.get('default_branch', 'main')}"
+            if full_name not in self.repos or payload.get('ref') != default_ref:
+                self.counters['ignored'] += 1
+                return 202, 'ignored'
+            self._schedule(full_name, payload.get('after'), repository.get('html_url'))
+        return 202, 'queued'
+
+    def _schedule(self, full_name: str, sha: Optional[str], html_url: Optional[str]):
+        """Push back a repository's refresh until its pushes go quiet (caller holds the lock)"""
+        now = time.monotonic()
+        pending = self._pending.get(full_name)
+        if pending:
+            self.counters['coalesced'] += 1
+            first_seen = pending['first_seen']
+        else:
+            first_seen = now
+
+        due = min(now + self.debounce, first_seen + self.max_debounce)
+        self._pending[full_name] = {
+            'due': due, 'first_seen': first_seen, 'sha': sha,
+            'html_url': html_url or f'https://github.com/{full_name}',
+        }
+        self._seq += 1
+        # Superseded heap entries are skipped when popped, see _next_due
+        heapq.heappush(self._queue, (due, self.repos[full_name], self._seq, full_name))
+        self._lock.notify()
+
+    def _next_due(self):
+        """Block until a repository is due and return it, highest priority first"""
+        with self._lock:
+            while not self._stopped:
+                now = time.monotonic()
+                ready = []
+                while self._queue and self._queue[0][0] <= now:
+                    due, priority, seq, full_name = heapq.heappop(self._queue)
+                    pending = self._pending.get(full_name)
+                    if pending and pending['due'] == due:
+                        ready.append((priority, seq, full_name))
+
+                if ready:
+                    ready.sort()
+                    # Put back the lower priority repositories that were also due
+                    for priority, seq, full_name in ready[1:]:
+                        heapq.heappush(self._queue, (self._pending[full_name]['due'], priority, seq, full_name))
+                    full_name = ready[0][2]
+                    return full_name, self._pending.pop(full_name)
+
+                timeout = self._queue[0][0] - now if self._queue else None
+                self._lock.wait(timeout)
+        return None, None
+
+    def _worker(self):
+        while True:
+            full_name, pending = self._next_due()
+            if full_name is None:
+                return
+            try:
+                print(f"Refreshing caches for {full_name} at {pending['sha']}")
+                self.generator.warm_cache(pending['html_url'], regenerate=self.regenerate)
+                outcome = 'refreshed'
+            except Exception as e:
+                print(f"Error refreshing {full_name}: {e}")
+                outcome = 'failed'
+            with self._lock:
+                self.counters[outcome] += 1
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {**self.counters, 'queued': len(self._pending)}
+
+    def start(self):
+        self._threads = [
+            threading.Thread(target=self.server.serve_forever, daemon=True),
+            threading.Thread(target=self._worker, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        print(f"Webhook receiver listening on {self.url}")
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._lock.notify_all()
+        # shutdown() waits for serve_forever, so it would hang on a receiver that was never started
+        if self._threads:
+            self.server.shutdown()
+        self.server.server_close()
+
+def receiver_from_env(generator) -> Optional[WebhookReceiver]:
+    """Build a receiver from WEBHOOK-* settings, or None when WEBHOOK-REPOS is unset.
+
+    A port that can't be bound disables the receiver instead of stopping the app.
+    """
+    repos = parse_registered_repos(os.getenv("WEBHOOK-REPOS", ""))
+    if not repos:
+        return None
+    try:
+        return WebhookReceiver(
+            generator, repos,
+            secret=os.getenv("WEBHOOK-SECRET"),
+            regenerate=os.getenv("WEBHOOK-REGENERATE", "false").lower() == "true",
+            host=os.getenv("WEBHOOK-HOST", "127.0.0.1"),
+            port=int(os.getenv("WEBHOOK-PORT", "8765")),
+        )
+    except OSError as e:
+        print(f"Webhook receiver disabled, could not listen on WEBHOOK-PORT: {e}")
+        return None
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Send a sample push event to a running webhook receiver")
+    parser.add_argument("repo", help="owner/name of a registered repository")
+    parser.add_argument("--sha", default="0" * 40)
+    parser.add_argument("--branch", default="main")
+    parser.add_argument("--url", default="http://127.0.0.1:8765/webhook")
+    parser.add_argument("--secret", default=os.getenv("WEBHOOK-SECRET"))
+    args = parser.parse_args()
+
+    status = post_sample_push(args.url, args.repo, args.sha, args.secret, args.branch)
+    print(f"Receiver answered {status}")